@@ -0,0 +1,20 @@
+"""
+Benchmarks run against a scratch Postgres database given by BENCH_DATABASE_URI
+(`postgresql+asyncpg://...`). Its `public` schema is dropped and migrated from scratch,
+never point it at a database you care about. Other settings are read from the environment
+as usual.
+
+Settings are read when `src` is imported, so the database is swapped in here, before any
+benchmark module runs.
+"""
+
+import os
+import sys
+
+BENCH_DATABASE_URI = os.environ.get("BENCH_DATABASE_URI")
+
+if not BENCH_DATABASE_URI:
+    sys.exit("BENCH_DATABASE_URI is not set")
+
+os.environ["DATABASE_URI"] = BENCH_DATABASE_URI
+os.environ["DATABASE_READ_URI"] = ""
@@ -0,0 +1,34 @@
+"""Database setup shared by the benchmarks."""
+
+import asyncio
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+
+from src.core.config import BASE_DIR
+from src.database.engine import async_engine
+
+
+async def migrate(revision: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "migrations"))
+    # Alembic runs its own event loop, keep it off ours.
+    await asyncio.to_thread(command.upgrade, config, revision)
+
+
+async def reset_database(revision: str = "head") -> None:
+    """Drop everything and migrate to `revision`."""
+    async with async_engine.begin() as connection:
+        await connection.execute(text("DROP SCHEMA public CASCADE"))
+        await connection.execute(text("CREATE SCHEMA public"))
+
+    await migrate(revision)
+
+
+async def execute_sql(*statements: str) -> None:
+    async with async_engine.connect() as connection:
+        # VACUUM can not run inside a transaction block.
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in statements:
+            await connection.execute(text(statement))
@@ -0,0 +1,162 @@
+"""
+Storage and lookup cost of raw_transaction before and after hashes, addresses and raw
+payloads moved from hex text to bytea and wei amounts to NUMERIC(78, 0).
+
+    BENCH_DATABASE_URI=postgresql+asyncpg://... python -m benchmarks.compact_types [rows]
+
+Rows are seeded at the revision before the change and measured, then the table is
+migrated in place and measured again. Hashes and addresses are random like real ones, so
+the indexes split the way they do in production.
+"""
+
+import asyncio
+import hashlib
+import random
+import sys
+import time
+
+from sqlalchemy import text
+
+from src.database.engine import async_engine
+
+from .common import execute_sql, migrate, reset_database
+
+BEFORE_REVISION = "b81f0e6d4a29"
+AFTER_REVISION = "e2c7a95b0f14"
+WALLETS = 10_000
+LOOKUPS = 5_000
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO raw_transaction (
+        external_id, created_at, updated_at, deleted, status, tx_hash, tx_from, tx_to,
+        tx_value, tx_fee, tx_input, gas_limit, nonce, block_number, confirmation_count,
+        confirmation_need, raw, max_fee_per_gas, max_priority_fee_per_gas
+    )
+    SELECT
+        'raw-' || i, now(), now(), false,
+        CASE WHEN i % 1000 < 3 THEN 'BROADCASTED' ELSE 'CONFIRMED' END,
+        '0x' || md5(i::text) || md5((-i)::text),
+        '0x' || left(md5('w' || i % :wallets) || md5('x' || i % :wallets), 40),
+        '0x' || left(md5('w' || (i + 1) % :wallets) || md5('x' || (i + 1) % :wallets), 40),
+        1000000000000000, 21000000000000, '0x', 21000, i / :wallets, i, 12, 12,
+        -- A signed EIP-1559 transfer is 110-120 bytes.
+        '0x02' || repeat(md5(i::text), 7), 1000000000, 1000000000
+    FROM generate_series(1, :rows) AS i
+    """,
+    # The migration rewrites the table and rebuilds every index, start from the same state.
+    "REINDEX TABLE raw_transaction",
+    "VACUUM ANALYZE raw_transaction",
+]
+
+SIZES_QUERY = """
+    SELECT 'table', pg_relation_size('raw_transaction')
+    UNION ALL
+    SELECT indexrelid::regclass::text, pg_relation_size(indexrelid)
+    FROM pg_index WHERE indrelid = 'raw_transaction'::regclass
+    UNION ALL
+    SELECT 'total', pg_total_relation_size('raw_transaction')
+"""
+
+LOOKUP_QUERIES = {
+    "tx_hash": "SELECT id FROM raw_transaction WHERE tx_hash = :value",
+    "tx_from, status": (
+        "SELECT id FROM raw_transaction WHERE tx_from = :value AND status = 'BROADCASTED'"
+    ),
+}
+
+
+def tx_hash(i: int) -> str:
+    return (
+        "0x" + hashlib.md5(str(i).encode()).hexdigest() + hashlib.md5(str(-i).encode()).hexdigest()
+    )
+
+
+def address(wallet: int) -> str:
+    digest = (
+        hashlib.md5(f"w{wallet}".encode()).hexdigest()
+        + hashlib.md5(f"x{wallet}".encode()).hexdigest()
+    )
+    return "0x" + digest[:40]
+
+
+def lookup_values(rows: int) -> dict[str, list[str]]:
+    picker = random.Random(0)
+    return {
+        "tx_hash": [tx_hash(picker.randint(1, rows)) for _ in range(LOOKUPS)],
+        "tx_from, status": [address(picker.randrange(WALLETS)) for _ in range(LOOKUPS)],
+    }
+
+
+async def sizes() -> dict[str, int]:
+    async with async_engine.connect() as connection:
+        result = await connection.execute(text(SIZES_QUERY))
+        return dict(result.all())
+
+
+async def lookup_latency(values: dict[str, list[str]], binary: bool) -> dict[str, float]:
+    """Mean latency in microseconds of one lookup, issued one after another."""
+    latency = {}
+    async with async_engine.connect() as connection:
+        for name, query in LOOKUP_QUERIES.items():
+            statement = text(query)
+            params = [bytes.fromhex(value[2:]) if binary else value for value in values[name]]
+
+            for value in params[:100]:  # Warm up the prepared statement cache.
+                await connection.execute(statement, {"value": value})
+
+            started = time.perf_counter()
+            for value in params:
+                await connection.execute(statement, {"value": value})
+            latency[name] = (time.perf_counter() - started) / len(params) * 1_000_000
+
+    return latency
+
+
+def print_report(before: dict, after: dict) -> None:
+    print(f"{'':<40} {'before':>12} {'after':>12} {'change':>8}")
+    for name in before:
+        old, new = before[name], after[name]
+        print(f"{name:<40} {old:>12.1f} {new:>12.1f} {(new - old) / old:>+8.0%}")
+
+
+async def main(rows: int) -> None:
+    values = lookup_values(rows)
+
+    await reset_database(BEFORE_REVISION)
+    started = time.perf_counter()
+    await execute_sql(
+        *(
+            statement.replace(":rows", str(rows)).replace(":wallets", str(WALLETS))
+            for statement in SEED_STATEMENTS
+        )
+    )
+    print(f"seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    sizes_before = await sizes()
+    latency_before = await lookup_latency(values, binary=False)
+
+    started = time.perf_counter()
+    await migrate(AFTER_REVISION)
+    print(f"migrated in {time.perf_counter() - started:.1f}s")
+    # Pooled connections cache statements prepared against the old column types.
+    await async_engine.dispose()
+    await execute_sql("VACUUM ANALYZE raw_transaction")
+
+    sizes_after = await sizes()
+    latency_after = await lookup_latency(values, binary=True)
+
+    mib = 1024 * 1024
+    print("\nsize, MiB")
+    print_report(
+        {name: size / mib for name, size in sizes_before.items()},
+        {name: size / mib for name, size in sizes_after.items()},
+    )
+    print(f"\nlookup, mean of {LOOKUPS}, us")
+    print_report(latency_before, latency_after)
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000))
@@ -0,0 +1,93 @@
+"""
+Cost of deriving one wallet account from ETH_WALLET_XPRIV on each path the code took.
+
+    BENCH_DATABASE_URI=postgresql+asyncpg://... python -m benchmarks.derivation [indexes]
+
+"root" is the original path: the root key is parsed and the whole m/44'/60'/0'/0/{index}
+path walked for every account. "xprv" parsed the cached extended key of m/44'/60'/0'/0
+and took one child step. "node" is the current `derive_account`, one child step from the
+cached parsed node. "cache hit" is `get_account_by_index` for an index derived before.
+Nothing is written to the database.
+"""
+
+import sys
+import time
+from collections.abc import Callable
+
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from hdwallet import BIP44HDWallet, HDWallet
+from hdwallet.cryptocurrencies import EthereumMainnet
+from hdwallet.derivations import BIP44Derivation
+from hdwallet.symbols import ETH
+
+from src.core.config import settings
+from src.modules.wallets.utils import derive_account, get_account_by_index
+
+# Fresh indexes for every path, nothing is served by a cache unless measured as such.
+FIRST_INDEX = 1_000_000
+
+
+def derive_from_root(xprivate_key: str, index: int) -> LocalAccount:
+    bip44_hdwallet = BIP44HDWallet(symbol=ETH)
+    bip44_hdwallet.from_xprivate_key(xprivate_key=xprivate_key)
+    bip44_hdwallet.clean_derivation()
+    bip44_hdwallet.from_path(
+        path=BIP44Derivation(cryptocurrency=EthereumMainnet, account=0, change=False, address=index)
+    )
+    return Account.from_key(bip44_hdwallet.private_key())
+
+
+def derive_from_xprv(chain_xprivate_key: str, index: int) -> LocalAccount:
+    hdwallet = HDWallet(symbol=ETH)
+    hdwallet.from_xprivate_key(xprivate_key=chain_xprivate_key)
+    hdwallet.from_index(index)
+    return Account.from_key(hdwallet.private_key())
+
+
+def measure(derive: Callable[[int], LocalAccount], indexes: range) -> float:
+    """Mean time in microseconds of one derivation."""
+    started = time.perf_counter()
+    for index in indexes:
+        derive(index)
+    return (time.perf_counter() - started) / len(indexes) * 1_000_000
+
+
+def main(count: int) -> None:
+    xprivate_key = settings.ETH_WALLET_XPRIV.get_secret_value()
+
+    hdwallet = HDWallet(symbol=ETH)
+    hdwallet.from_xprivate_key(xprivate_key=xprivate_key)
+    hdwallet.from_path(path="m/44'/60'/0'/0")
+    chain_xprivate_key = hdwallet.xprivate_key()
+
+    for index in (0, 1, count):
+        assert (
+            derive_from_root(xprivate_key, index).address
+            == derive_from_xprv(chain_xprivate_key, index).address
+            == derive_account(xprivate_key, index).address
+        ), f"paths derive different accounts for index {index}"
+
+    paths = {
+        "root": lambda index: derive_from_root(xprivate_key, index),
+        "xprv": lambda index: derive_from_xprv(chain_xprivate_key, index),
+        "node": lambda index: derive_account(xprivate_key, index),
+    }
+
+    print(f"{'path':<10} {'us/account':>12} {'accounts/s':>12}")
+    for offset, (name, derive) in enumerate(paths.items()):
+        start = FIRST_INDEX + offset * count
+        mean = measure(derive, range(start, start + count))
+        print(f"{name:<10} {mean:>12.1f} {1_000_000 / mean:>12.0f}")
+
+    cached = range(FIRST_INDEX, FIRST_INDEX + min(count, settings.HD_ACCOUNT_CACHE_SIZE))
+    for index in cached:
+        get_account_by_index(xprivate_key=xprivate_key, index=index)
+    mean = measure(
+        lambda index: get_account_by_index(xprivate_key=xprivate_key, index=index), cached
+    )
+    print(f"{'cache hit':<10} {mean:>12.1f} {1_000_000 / mean:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
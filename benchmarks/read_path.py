@@ -0,0 +1,121 @@
+"""
+Read path of `select(RawTransaction)`: statements issued and rows/sec before and after
+relationships stopped being eager loaded and plain selects skipped the ORM.
+
+    BENCH_DATABASE_URI=postgresql+asyncpg://... python -m benchmarks.read_path [rows]
+
+"before" reproduces the old path: `lazy="selectin"` on both relationships and ORM
+instances turned into dicts with `asdict()`. "after" is the current `fetch_all`.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import selectinload
+
+from src.database.engine import async_engine, async_session
+from src.database.utils import fetch_all
+from src.modules.transactions.enums import RawTransactionStatus
+from src.modules.transactions.models import RawTransaction, SystemTransaction
+
+from .common import execute_sql, reset_database
+
+ROUNDS = 5
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO wallet (external_id, created_at, updated_at, deleted, address, status, nonce)
+    SELECT 'wallet-' || i, now(), now(), false, '0x' || lpad(to_hex(i), 40, '0'), 'ACTIVE', 0
+    FROM generate_series(1, 2) AS i
+    """,
+    """
+    INSERT INTO raw_transaction (
+        external_id, created_at, updated_at, deleted, status, tx_hash, tx_from, tx_to,
+        tx_value, tx_fee, gas_limit, nonce, block_number, confirmation_count,
+        confirmation_need, max_fee_per_gas, max_priority_fee_per_gas
+    )
+    SELECT
+        'raw-' || i, now(), now(), false,
+        CASE WHEN i % 10 = 0 THEN 'CONFIRMED' ELSE 'PENDING' END,
+        decode(lpad(to_hex(i), 64, '0'), 'hex'), decode(lpad('1', 40, '0'), 'hex'),
+        decode(lpad('2', 40, '0'), 'hex'), 1000000000000000, 21000000000000, 21000, i, i,
+        1, 12, 1000000000, 1000000000
+    FROM generate_series(1, :rows) AS i
+    """,
+    # Every transaction between two of our wallets, one system transaction per side.
+    """
+    INSERT INTO system_transaction (
+        external_id, created_at, updated_at, deleted, origin_id, wallet_id, amount, status,
+        direction
+    )
+    SELECT 'system-' || id || '-' || direction, now(), now(), false, id, wallet_id, '0.001',
+        'PENDING', direction
+    FROM raw_transaction, (VALUES (1, 'OUT'), (2, 'IN')) AS sides (wallet_id, direction)
+    """,
+    "VACUUM ANALYZE",
+]
+
+
+def query():
+    return select(RawTransaction).where(RawTransaction.status == RawTransactionStatus.PENDING)
+
+
+async def read_before() -> list[dict]:
+    async with async_session() as session:
+        result = await session.execute(
+            query().options(
+                selectinload(RawTransaction.system_transactions).selectinload(
+                    SystemTransaction.origin
+                )
+            )
+        )
+        return [obj.asdict() for obj in result.scalars().all()]
+
+
+async def read_after() -> list[dict]:
+    return await fetch_all(query())
+
+
+async def measure(read: Callable[[], Awaitable[list[dict]]]) -> tuple[int, int, float]:
+    statements = 0
+
+    def count(*args) -> None:
+        nonlocal statements
+        statements += 1
+
+    await read()  # Warm up caches and the connection pool.
+
+    best = float("inf")
+    for _ in range(ROUNDS):
+        event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+        statements = 0
+        started = time.perf_counter()
+        rows = len(await read())
+        best = min(best, time.perf_counter() - started)
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    return statements, rows, best
+
+
+async def main(rows: int) -> None:
+    await reset_database()
+    await execute_sql(*(statement.replace(":rows", str(rows)) for statement in SEED_STATEMENTS))
+
+    print(
+        f"{'path':<8} {'statements':>10} {'rows':>8} {'best of ' + str(ROUNDS):>12} {'rows/s':>10}"
+    )
+    for name, read in [("before", read_before), ("after", read_after)]:
+        statements, count, elapsed = await measure(read)
+        print(
+            f"{name:<8} {statements:>10} {count:>8} {elapsed * 1000:>10.1f}ms"
+            f" {count / elapsed:>10.0f}"
+        )
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
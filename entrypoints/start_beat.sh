@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+
+set -e
+
+MODULE_NAME="src.celery.config"
+
+celery -A $MODULE_NAME beat --loglevel=INFO --logfile=logs/beat.log
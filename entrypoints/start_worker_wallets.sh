@@ -0,0 +1,11 @@
+#!/usr/bin/env bash
+
+set -e
+
+MODULE_NAME="src.celery.config"
+QUEUE_NAME="eth_wallets_queue"
+
+celery -A $MODULE_NAME worker \
+  -Ofair -Q $QUEUE_NAME -P solo \
+  --loglevel=DEBUG --logfile=logs/worker_wallets.log \
+  --without-gossip --without-mingle --without-heartbeat
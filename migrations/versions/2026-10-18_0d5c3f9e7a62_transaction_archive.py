@@ -0,0 +1,41 @@
+"""transaction archive
+
+Revision ID: 0d5c3f9e7a62
+Revises: e2c7a95b0f14
+Create Date: 2026-10-18 21:48:13.305971
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0d5c3f9e7a62"
+down_revision: Union[str, None] = "e2c7a95b0f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["raw_transaction", "system_transaction"]
+
+
+def upgrade() -> None:
+    # Same columns as the hot tables, monthly partitions are created by the archiver.
+    for table in TABLES:
+        op.execute(
+            f"""
+            CREATE TABLE {table}_archive (
+                LIKE {table},
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+
+    op.create_index("ix_raw_transaction_archive_tx_hash", "raw_transaction_archive", ["tx_hash"])
+    op.create_index(
+        "ix_system_transaction_archive_wallet_id", "system_transaction_archive", ["wallet_id"]
+    )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_table(f"{table}_archive")
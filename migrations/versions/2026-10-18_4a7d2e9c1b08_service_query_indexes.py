@@ -0,0 +1,57 @@
+"""service query indexes
+
+Revision ID: 4a7d2e9c1b08
+Revises: 0d5c3f9e7a62
+Create Date: 2026-10-18 21:12:37.518204
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4a7d2e9c1b08"
+down_revision: Union[str, None] = "0d5c3f9e7a62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_WALLET_WHERE = sa.text("status = 'ACTIVE'")
+FINALIZED_STATUS_WHERE = sa.text("status IN ('CONFIRMED', 'FAILED', 'DROPPED_AND_REPLACED')")
+
+
+def upgrade() -> None:
+    # Built concurrently, the scanner keeps writing to these tables during the migration.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_wallet_active",
+            "wallet",
+            ["index"],
+            unique=False,
+            postgresql_where=ACTIVE_WALLET_WHERE,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_raw_transaction_finalized_updated_at",
+            "raw_transaction",
+            ["updated_at"],
+            unique=False,
+            postgresql_where=FINALIZED_STATUS_WHERE,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_raw_transaction_finalized_updated_at",
+            table_name="raw_transaction",
+            postgresql_where=FINALIZED_STATUS_WHERE,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_wallet_active",
+            table_name="wallet",
+            postgresql_where=ACTIVE_WALLET_WHERE,
+            postgresql_concurrently=True,
+        )
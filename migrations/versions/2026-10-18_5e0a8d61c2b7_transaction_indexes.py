@@ -0,0 +1,90 @@
+"""transaction indexes
+
+Revision ID: 5e0a8d61c2b7
+Revises: 9f4b2c7a1d3e
+Create Date: 2026-10-18 16:41:09.730264
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5e0a8d61c2b7"
+down_revision: Union[str, None] = "9f4b2c7a1d3e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_STATUS_WHERE = sa.text("status IN ('CREATED', 'BROADCASTED', 'PENDING')")
+
+
+def upgrade() -> None:
+    # Built concurrently, the scanner keeps writing to these tables during the migration.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_raw_transaction_tx_hash",
+            "raw_transaction",
+            ["tx_hash"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_raw_transaction_tx_from_status",
+            "raw_transaction",
+            ["tx_from", "status"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_raw_transaction_active_status",
+            "raw_transaction",
+            ["status"],
+            unique=False,
+            postgresql_where=ACTIVE_STATUS_WHERE,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_system_transaction_origin_id",
+            "system_transaction",
+            ["origin_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_system_transaction_wallet_id",
+            "system_transaction",
+            ["wallet_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_system_transaction_wallet_id",
+            table_name="system_transaction",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_system_transaction_origin_id",
+            table_name="system_transaction",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_raw_transaction_active_status",
+            table_name="raw_transaction",
+            postgresql_where=ACTIVE_STATUS_WHERE,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_raw_transaction_tx_from_status",
+            table_name="raw_transaction",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_raw_transaction_tx_hash",
+            table_name="raw_transaction",
+            postgresql_concurrently=True,
+        )
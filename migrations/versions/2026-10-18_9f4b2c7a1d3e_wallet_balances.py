@@ -0,0 +1,66 @@
+"""wallet balances
+
+Revision ID: 9f4b2c7a1d3e
+Revises: c3bc3858e151
+Create Date: 2026-10-18 14:03:21.184512
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9f4b2c7a1d3e"
+down_revision: Union[str, None] = "c3bc3858e151"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "wallet",
+        sa.Column("confirmed_balance", sa.Numeric(78, 0), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "wallet",
+        sa.Column("pending_balance", sa.Numeric(78, 0), server_default="0", nullable=False),
+    )
+    # Replay existing system transactions, amounts are stored in ether, fees in wei.
+    op.execute(
+        """
+        UPDATE wallet
+        SET confirmed_balance = balance.confirmed_balance,
+            pending_balance = balance.pending_balance
+        FROM (
+            SELECT
+                delta.wallet_id,
+                COALESCE(SUM(delta.amount) FILTER (WHERE delta.status = 'CONFIRMED'), 0)
+                    AS confirmed_balance,
+                COALESCE(SUM(delta.amount) FILTER (WHERE delta.status = 'PENDING'), 0)
+                    AS pending_balance
+            FROM (
+                SELECT
+                    system_transaction.wallet_id,
+                    system_transaction.status,
+                    CASE
+                        WHEN system_transaction.direction = 'IN'
+                            THEN system_transaction.amount::numeric * 1000000000000000000
+                        ELSE -(
+                            system_transaction.amount::numeric * 1000000000000000000
+                            + COALESCE(raw_transaction.tx_fee, 0)
+                        )
+                    END AS amount
+                FROM system_transaction
+                JOIN raw_transaction ON raw_transaction.id = system_transaction.origin_id
+            ) AS delta
+            GROUP BY delta.wallet_id
+        ) AS balance
+        WHERE wallet.id = balance.wallet_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("wallet", "pending_balance")
+    op.drop_column("wallet", "confirmed_balance")
@@ -0,0 +1,108 @@
+"""unique transactions
+
+Revision ID: b81f0e6d4a29
+Revises: 5e0a8d61c2b7
+Create Date: 2026-10-18 18:27:52.046118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b81f0e6d4a29"
+down_revision: Union[str, None] = "5e0a8d61c2b7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same replay as in the wallet balances migration, duplicates were counted there.
+RECALCULATE_BALANCES = """
+    UPDATE wallet
+    SET confirmed_balance = COALESCE(balance.confirmed_balance, 0),
+        pending_balance = COALESCE(balance.pending_balance, 0)
+    FROM wallet AS target
+    LEFT JOIN (
+        SELECT
+            delta.wallet_id,
+            SUM(delta.amount) FILTER (WHERE delta.status = 'CONFIRMED') AS confirmed_balance,
+            SUM(delta.amount) FILTER (WHERE delta.status = 'PENDING') AS pending_balance
+        FROM (
+            SELECT
+                system_transaction.wallet_id,
+                system_transaction.status,
+                CASE
+                    WHEN system_transaction.direction = 'IN'
+                        THEN system_transaction.amount::numeric * 1000000000000000000
+                    ELSE -(
+                        system_transaction.amount::numeric * 1000000000000000000
+                        + COALESCE(raw_transaction.tx_fee, 0)
+                    )
+                END AS amount
+            FROM system_transaction
+            JOIN raw_transaction ON raw_transaction.id = system_transaction.origin_id
+        ) AS delta
+        GROUP BY delta.wallet_id
+    ) AS balance ON balance.wallet_id = target.id
+    WHERE wallet.id = target.id
+"""
+
+
+def upgrade() -> None:
+    # Keep the first stored row of every transaction, move system transactions onto it.
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE raw_transaction_duplicate ON COMMIT DROP AS
+        SELECT id, MIN(id) OVER (PARTITION BY tx_hash) AS keep_id
+        FROM raw_transaction
+        """
+    )
+    op.execute(
+        """
+        UPDATE system_transaction
+        SET origin_id = duplicate.keep_id
+        FROM raw_transaction_duplicate AS duplicate
+        WHERE system_transaction.origin_id = duplicate.id AND duplicate.id <> duplicate.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM raw_transaction
+        USING raw_transaction_duplicate AS duplicate
+        WHERE raw_transaction.id = duplicate.id AND duplicate.id <> duplicate.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM system_transaction
+        USING system_transaction AS kept
+        WHERE system_transaction.origin_id = kept.origin_id
+            AND system_transaction.wallet_id = kept.wallet_id
+            AND system_transaction.direction = kept.direction
+            AND system_transaction.id > kept.id
+        """
+    )
+    op.execute(RECALCULATE_BALANCES)
+
+    op.drop_index("ix_raw_transaction_tx_hash", table_name="raw_transaction")
+    op.create_index("ix_raw_transaction_tx_hash", "raw_transaction", ["tx_hash"], unique=True)
+
+    op.drop_index("ix_system_transaction_origin_id", table_name="system_transaction")
+    op.create_unique_constraint(
+        "uq_system_transaction_origin_id_wallet_id_direction",
+        "system_transaction",
+        ["origin_id", "wallet_id", "direction"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        "uq_system_transaction_origin_id_wallet_id_direction",
+        "system_transaction",
+        type_="unique",
+    )
+    op.create_index(
+        "ix_system_transaction_origin_id", "system_transaction", ["origin_id"], unique=False
+    )
+
+    op.drop_index("ix_raw_transaction_tx_hash", table_name="raw_transaction")
+    op.create_index("ix_raw_transaction_tx_hash", "raw_transaction", ["tx_hash"], unique=False)
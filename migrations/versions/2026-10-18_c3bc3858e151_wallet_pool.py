@@ -0,0 +1,39 @@
+"""wallet pool
+
+Revision ID: c3bc3858e151
+Revises: 7397001d28c1
+Create Date: 2026-10-18 10:12:40.518207
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3bc3858e151"
+down_revision: Union[str, None] = "7397001d28c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("wallet", sa.Column("issued_at", sa.DateTime(), nullable=True))
+    # Every wallet created so far was handed out on creation.
+    op.execute("UPDATE wallet SET issued_at = created_at")
+    op.create_index(
+        "ix_wallet_pool",
+        "wallet",
+        ["index"],
+        unique=False,
+        postgresql_where=sa.text("status = 'INACTIVE' AND issued_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_wallet_pool",
+        table_name="wallet",
+        postgresql_where=sa.text("status = 'INACTIVE' AND issued_at IS NULL"),
+    )
+    op.drop_column("wallet", "issued_at")
@@ -0,0 +1,65 @@
+"""binary transaction columns
+
+Revision ID: e2c7a95b0f14
+Revises: b81f0e6d4a29
+Create Date: 2026-10-18 20:05:37.912604
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2c7a95b0f14"
+down_revision: Union[str, None] = "b81f0e6d4a29"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+HEX_COLUMNS = ["tx_hash", "tx_from", "tx_to", "tx_input", "replaced_by", "raw"]
+WEI_COLUMNS = ["tx_value", "tx_fee"]
+
+
+def upgrade() -> None:
+    for column in HEX_COLUMNS:
+        op.alter_column(
+            "raw_transaction",
+            column,
+            type_=sa.LargeBinary(),
+            postgresql_using=f"decode(regexp_replace({column}, '^0x', ''), 'hex')",
+        )
+
+    for column in WEI_COLUMNS:
+        op.alter_column(
+            "raw_transaction",
+            column,
+            type_=sa.Numeric(78, 0),
+            postgresql_using=f"{column}::numeric(78, 0)",
+        )
+
+
+def downgrade() -> None:
+    # Values above the BIGINT range can not be converted back.
+    for column in WEI_COLUMNS:
+        op.alter_column(
+            "raw_transaction",
+            column,
+            type_=sa.BigInteger(),
+            postgresql_using=f"{column}::bigint",
+        )
+
+    # Addresses come back lowercase, checksums are not stored.
+    for column, type_ in [
+        ("tx_hash", sa.String(255)),
+        ("tx_from", sa.String(255)),
+        ("tx_to", sa.String(255)),
+        ("tx_input", sa.Text()),
+        ("replaced_by", sa.String(255)),
+        ("raw", sa.Text()),
+    ]:
+        op.alter_column(
+            "raw_transaction",
+            column,
+            type_=type_,
+            postgresql_using=f"'0x' || encode({column}, 'hex')",
+        )
@@ -1,16 +1,49 @@
 from celery import Celery
 from celery.signals import setup_logging as celery_setup_logging
+from src.core.config import settings
 from src.core.logger import setup_logging as setup_system_logging
 
 app = Celery(
     "eth_service",
     broker="redis://localhost:6379/11",
     include=[
+        "src.modules.clearing.tasks",
+        "src.modules.reconciliation.tasks",
         "src.modules.scanner.tasks",
+        "src.modules.transactions.tasks",
+        "src.modules.wallets.tasks",
     ],
 )
 SCANNER_QUEUE = "eth_scanner_queue"
 BROADCAST_QUEUE = "eth_broadcast_queue"
+WALLETS_QUEUE = "eth_wallets_queue"
+
+app.conf.beat_schedule = {
+    "fill_wallet_pool": {
+        "task": "fill_wallet_pool",
+        "schedule": settings.WALLET_POOL_FILL_INTERVAL,
+    },
+    "accelerate_stuck_transactions": {
+        "task": "accelerate_stuck_transactions",
+        "schedule": settings.ACCELERATOR_INTERVAL,
+    },
+    "sweep_deposit_wallets": {
+        "task": "sweep_deposit_wallets",
+        "schedule": settings.SWEEP_INTERVAL,
+    },
+    "reconcile_wallets": {
+        "task": "reconcile_wallets",
+        "schedule": settings.RECONCILIATION_INTERVAL,
+    },
+    "archive_finalized_transactions": {
+        "task": "archive_finalized_transactions",
+        "schedule": settings.ARCHIVE_INTERVAL,
+    },
+    "redrive_withdrawals": {
+        "task": "redrive_withdrawals",
+        "schedule": settings.WITHDRAWAL_REDRIVE_INTERVAL,
+    },
+}
 
 
 @celery_setup_logging.connect
@@ -21,15 +21,84 @@ class Settings(BaseSettings):
 
     SETTINGS_MODULE: Literal["DEV", "PROD"] = "DEV"
     DATABASE_URI: str | PostgresDsn
+    # Read replica serving plain reads made outside of a unit of work, primary if unset.
+    DATABASE_READ_URI: str | PostgresDsn | None = None
     REDIS_URI: str | RedisDsn
     CELERY_BROKER_URL: str | RedisDsn
 
     ETH_WALLET_XPRIV: SecretStr
     ETH_RPC_URL: str
     CHAIN_ID: int = 1
+    # Upper bound of calls sent to the node in one JSON-RPC batch POST.
+    ETH_RPC_MAX_BATCH_SIZE: int = 100
+    # Upper bound of batch POSTs one `batch_request` keeps in flight at once.
+    ETH_RPC_MAX_CONCURRENT_BATCHES: int = 4
+
+    # How many blocks the scanner fetches ahead of the one it is currently processing.
+    SCANNER_PREFETCH_WINDOW: int = 10
 
     SECRET_KEY: SecretStr
 
+    # How many derived wallet accounts are kept in memory.
+    HD_ACCOUNT_CACHE_SIZE: int = 10_000
+    # Process pool used to derive addresses for bulk wallet creation, None means CPU count.
+    WALLET_DERIVATION_WORKERS: int | None = None
+    WALLET_BATCH_MAX_SIZE: int = 100_000
+    # Pre-derived inactive wallets kept ready to be handed out by `POST /wallet`.
+    WALLET_POOL_SIZE: int = 1_000
+    WALLET_POOL_FILL_BATCH: int = 1_000
+    WALLET_POOL_FILL_INTERVAL: int = 30  # seconds
+
+    # Gas oracle is refreshed by the scanner on every new head. Redis copy expires after
+    # GAS_ORACLE_MAX_AGE, processes re-read it at most every GAS_ORACLE_LOCAL_TTL seconds.
+    GAS_ORACLE_MAX_AGE: int = 60
+    GAS_ORACLE_LOCAL_TTL: float = 2.0
+    # Rolling window of blocks the fee estimator takes reward percentiles from.
+    GAS_ORACLE_HISTORY_BLOCKS: int = 20
+    GAS_MIN_PRIORITY_FEE: int = 10_000_000  # wei, 0.01 gwei
+
+    BLOCK_TIME: int = 12  # seconds
+    # Broadcasted transactions not mined within this many blocks are re-sent with bumped
+    # fees, every replacement pays at least REPLACEMENT_FEE_BUMP_PERCENT more.
+    ACCELERATOR_STUCK_BLOCKS: int = 10
+    ACCELERATOR_INTERVAL: int = 60  # seconds
+    REPLACEMENT_FEE_BUMP_PERCENT: int = 13
+    REPLACEMENT_MAX_FEE_PER_GAS: int = 500_000_000_000  # wei, 500 gwei
+
+    # Deposit wallets are swept into the main wallet only while the base fee is at most
+    # SWEEP_MAX_BASE_FEE, and only if at least SWEEP_MIN_VALUE is left after paying a fee
+    # of at most SWEEP_MAX_FEE_PERCENT of the balance.
+    SWEEP_INTERVAL: int = 300  # seconds
+    SWEEP_GAS_POLICY: Literal["STANDARD", "FAST", "FASTEST"] = "STANDARD"
+    SWEEP_MAX_BASE_FEE: int = 30_000_000_000  # wei, 30 gwei
+    SWEEP_MIN_VALUE: int = 1_000_000_000_000_000  # wei, 0.001 ETH
+    SWEEP_MAX_FEE_PERCENT: int = 5
+
+    # Wallets are compared with the chain in chunks, each chunk is one JSON-RPC round trip.
+    RECONCILIATION_INTERVAL: int = 60 * 60  # seconds
+    RECONCILIATION_CHUNK_SIZE: int = 1_000
+    RECONCILIATION_CONCURRENCY: int = 8
+
+    # Finalized transactions older than this are moved to the archive tables.
+    ARCHIVE_INTERVAL: int = 60 * 60  # seconds
+    ARCHIVE_RETENTION_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 5_000
+
+    # Where transactions are signed: a thread pool shares the derived key cache with the
+    # event loop process, a process pool keeps signing off its GIL entirely.
+    SIGNING_EXECUTOR: Literal["thread", "process"] = "thread"
+    SIGNING_WORKERS: int = 4
+
+    # How many times a withdrawal is re-signed with a fresh nonce after a nonce conflict.
+    WITHDRAW_MAX_RETRIES: int = 3
+    # Queued withdrawals of one wallet signed and broadcast per broadcaster iteration.
+    WITHDRAWAL_BATCH_SIZE: int = 50
+    # Beat re-dispatches broadcasters of non-empty queues every WITHDRAWAL_REDRIVE_INTERVAL
+    # and recovers withdrawals in PROCESSING for longer than WITHDRAWAL_PROCESSING_TIMEOUT,
+    # which must exceed the 10 minute lifetime of the per-wallet queue lock.
+    WITHDRAWAL_REDRIVE_INTERVAL: int = 60  # seconds
+    WITHDRAWAL_PROCESSING_TIMEOUT: int = 15 * 60  # seconds
+
 
 settings = Settings()
 
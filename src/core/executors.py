@@ -0,0 +1,27 @@
+import asyncio
+import functools
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Literal
+
+_executors: dict[str, Executor] = {}
+
+
+def get_executor(
+    name: str,
+    kind: Literal["thread", "process"] = "thread",
+    max_workers: int | None = None,
+) -> Executor:
+    """Return the process-wide executor registered under `name`, creating it on first use."""
+    if name not in _executors:
+        if kind == "process":
+            _executors[name] = ProcessPoolExecutor(max_workers=max_workers)
+        else:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    return _executors[name]
+
+
+async def run_in_executor(executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
@@ -14,6 +14,7 @@ from starlette.exceptions import HTTPException
 
 from src.core.config import CONTEXT_ID
 from src.core.exceptions import JsonException
+from src.database.utils import unit_of_work
 
 logger = logging.getLogger("root")
 
@@ -124,6 +125,19 @@ def log_body(
     return _log
 
 
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def unit_of_work_middleware(request: Request, call_next):
+    # Reads run without a unit of work, so their queries can go to the read replica.
+    if request.method in SAFE_METHODS:
+        return await call_next(request)
+
+    # One database session and one commit per request, rolled back if the request fails.
+    async with unit_of_work():
+        return await call_next(request)
+
+
 async def request_id_middleware(request: Request, call_next):
     CONTEXT_ID.set(request.headers.get("X-Request-ID", str(token_urlsafe(16))))
     return await call_next(request)
@@ -131,6 +145,7 @@ async def request_id_middleware(request: Request, call_next):
 
 def setup_middlewares(app: FastAPI):
     # app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.middleware("http")(unit_of_work_middleware)
     app.middleware("http")(catch_exceptions_middleware)
     app.middleware("http")(request_logging_middleware)
     app.middleware("http")(request_id_middleware)
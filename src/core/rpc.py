@@ -0,0 +1,168 @@
+import asyncio
+import itertools
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+import aiohttp
+
+from src.core.config import settings
+
+logger = logging.getLogger("root")
+
+RPC_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+_request_id = itertools.count(1)
+_session: aiohttp.ClientSession | None = None
+_session_loop: asyncio.AbstractEventLoop | None = None
+
+
+class RPCError(ValueError):
+    """JSON-RPC error object returned by the node for a single call."""
+
+    def __init__(self, error: dict) -> None:
+        super().__init__(error)
+        self.code = error.get("code")
+        self.message = error.get("message")
+
+
+async def _get_session() -> aiohttp.ClientSession:
+    global _session, _session_loop
+
+    # Celery tasks run each job in a fresh event loop, sessions can not be shared between them.
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession(timeout=RPC_TIMEOUT)
+        _session_loop = loop
+
+    return _session
+
+
+async def _post_batch(calls: Sequence[tuple[str, list]]) -> list[Any]:
+    payload = [
+        {"jsonrpc": "2.0", "id": next(_request_id), "method": method, "params": params}
+        for method, params in calls
+    ]
+
+    session = await _get_session()
+    async with session.post(settings.ETH_RPC_URL, json=payload) as response:
+        response.raise_for_status()
+        body = await response.json()
+
+    if isinstance(body, dict):
+        # Node rejected the batch as a whole.
+        raise RPCError(body.get("error") or {"message": f"Unexpected batch response: {body}"})
+
+    responses = {item.get("id"): item for item in body}
+    results = []
+    for request in payload:
+        item = responses.get(request["id"])
+
+        if item is None:
+            results.append(RPCError({"message": f"No response for {request['method']}"}))
+        elif "error" in item:
+            results.append(RPCError(item["error"]))
+        else:
+            results.append(item.get("result"))
+
+    return results
+
+
+async def batch_request(
+    calls: Sequence[tuple[str, list]],
+    max_batch_size: int = settings.ETH_RPC_MAX_BATCH_SIZE,
+    return_exceptions: bool = False,
+    max_concurrency: int = settings.ETH_RPC_MAX_CONCURRENT_BATCHES,
+) -> list[Any]:
+    """
+    Send `calls` as JSON-RPC batch POSTs of at most `max_batch_size` calls each, at most
+    `max_concurrency` of them in flight at once, and return raw results in the same order
+    as `calls`.
+
+    Per-call errors are raised as `RPCError`, or returned in place of the result when
+    `return_exceptions` is set, the same way `asyncio.gather` does it.
+    """
+    if not calls:
+        return []
+
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def post_chunk(chunk: Sequence[tuple[str, list]]) -> list[Any]:
+        async with semaphore:
+            return await _post_batch(chunk)
+
+    chunks = await asyncio.gather(
+        *(
+            post_chunk(calls[offset : offset + max_batch_size])
+            for offset in range(0, len(calls), max_batch_size)
+        )
+    )
+    results = list(itertools.chain.from_iterable(chunks))
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+
+    return results
+
+
+class RPCBatcher:
+    """
+    Coalesces JSON-RPC calls made in the same event loop tick into batch POSTs.
+
+    Callers simply `await rpc_batcher.request(method, params)`, the first call of a tick
+    schedules a flush and every call queued until then goes out in the same batch.
+    """
+
+    def __init__(self, max_batch_size: int = settings.ETH_RPC_MAX_BATCH_SIZE) -> None:
+        self.max_batch_size = max_batch_size
+        self._queue: list[tuple[str, list, asyncio.Future]] = []
+        self._flush_scheduled = False
+        # The loop only keeps weak references to tasks, in-flight sends are held here.
+        self._send_tasks: set[asyncio.Task] = set()
+
+    async def request(self, method: str, params: list) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((method, params, future))
+
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        queue, self._queue = self._queue, []
+        self._flush_scheduled = False
+
+        for offset in range(0, len(queue), self.max_batch_size):
+            task = asyncio.ensure_future(self._send(queue[offset : offset + self.max_batch_size]))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+
+    @staticmethod
+    async def _send(queue: list[tuple[str, list, asyncio.Future]]) -> None:
+        try:
+            results = await _post_batch([(method, params) for method, params, _ in queue])
+        except Exception as exc:
+            for _, _, future in queue:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, _, future), result in zip(queue, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(result, RPCError):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+rpc_batcher = RPCBatcher()
+
+
+async def rpc_request(method: str, params: list) -> Any:
+    return await rpc_batcher.request(method, params)
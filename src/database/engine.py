@@ -7,3 +7,12 @@ async_engine = create_async_engine(
 )
 
 async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# Optional replica for plain reads, see `src.database.utils`. Falls back to the primary.
+async_read_engine = (
+    create_async_engine(url=settings.DATABASE_READ_URI)
+    if settings.DATABASE_READ_URI
+    else async_engine
+)
+
+async_read_session = async_sessionmaker(async_read_engine, expire_on_commit=False)
@@ -0,0 +1,51 @@
+from decimal import Decimal
+from typing import Any
+
+from eth_utils import to_bytes, to_checksum_address
+from sqlalchemy import Dialect, LargeBinary, Numeric
+from sqlalchemy.types import TypeDecorator
+
+
+class HexBinary(TypeDecorator):
+    """`0x` prefixed hex string in Python, raw bytes (`bytea`) in the database."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | bytes | None, dialect: Dialect) -> bytes | None:
+        if value is None or isinstance(value, bytes):
+            return value
+        return to_bytes(hexstr=value)
+
+    def process_result_value(self, value: bytes | None, dialect: Dialect) -> str | None:
+        if value is None:
+            return None
+        return "0x" + bytes(value).hex()
+
+
+class AddressBinary(HexBinary):
+    """Checksummed address in Python, 20 raw bytes in the database."""
+
+    cache_ok = True
+
+    def process_result_value(self, value: bytes | None, dialect: Dialect) -> str | None:
+        if value is None:
+            return None
+        return to_checksum_address(bytes(value))
+
+
+class Wei(TypeDecorator):
+    """Integer wei amount in Python, `NUMERIC(78, 0)` in the database (fits any uint256)."""
+
+    impl = Numeric(78, 0)
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Decimal | None:
+        if value is None:
+            return None
+        return Decimal(int(value))
+
+    def process_result_value(self, value: Decimal | None, dialect: Dialect) -> int | None:
+        if value is None:
+            return None
+        return int(value)
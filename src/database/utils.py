@@ -1,9 +1,118 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from typing import Any
 
 from sqlalchemy import Delete, Insert, Select, Update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.database.engine import async_session
+from src.database.engine import async_read_session, async_session
+
+# Session of the unit of work opened by the current task (block scan, HTTP request, ...).
+CURRENT_SESSION: ContextVar[AsyncSession | None] = ContextVar("current_session", default=None)
+
+
+@asynccontextmanager
+async def unit_of_work(
+    session: async_sessionmaker[AsyncSession] = async_session,
+    detached: bool = False,
+) -> AsyncIterator[AsyncSession]:
+    """
+    Run everything inside the block on one session and one database transaction.
+
+    All `fetch_one`, `fetch_all` and `execute` calls made inside the block (from any
+    depth of the call stack) reuse this session instead of opening their own, and the
+    transaction is committed once when the block exits, or rolled back on error.
+    Nested `unit_of_work` blocks join the outer one, unless `detached` is set: then the
+    block gets its own session and commits on its own, e.g. for work streamed out of a
+    request after the request's unit of work is over.
+    """
+    current_session = CURRENT_SESSION.get()
+
+    if current_session is not None and not detached:
+        yield current_session
+        return
+
+    async with session() as new_session:
+        token = CURRENT_SESSION.set(new_session)
+        try:
+            yield new_session
+            await new_session.commit()
+        except BaseException:
+            await new_session.rollback()
+            raise
+        finally:
+            CURRENT_SESSION.reset(token)
+
+        for callback in new_session.info.pop("after_commit", []):
+            await callback()
+
+
+async def after_commit(callback: Callable[[], Awaitable[Any]]) -> None:
+    """
+    Run `callback` once the current unit of work is committed, or right away outside of it.
+    Use it for side effects other processes act on (Redis, queues) that must not see
+    uncommitted rows.
+    """
+    current_session = CURRENT_SESSION.get()
+
+    if current_session is None:
+        await callback()
+    else:
+        current_session.info.setdefault("after_commit", []).append(callback)
+
+
+@asynccontextmanager
+async def _session_scope(
+    session: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncSession]:
+    current_session = CURRENT_SESSION.get()
+
+    if current_session is not None:
+        # Commit is up to the unit of work.
+        yield current_session
+        return
+
+    async with session() as new_session:
+        yield new_session
+        await new_session.commit()
+
+
+def _route_session(
+    query: Select | Insert | Update,
+    session: async_sessionmaker[AsyncSession],
+    use_primary: bool,
+) -> async_sessionmaker[AsyncSession]:
+    """
+    Send plain reads made outside of a unit of work to the read replica. Writes, locking
+    reads (FOR UPDATE), explicitly passed sessions and `use_primary` calls stay on the
+    primary. Pass `use_primary=True` to read your own writes, replica may lag behind.
+    """
+    if (
+        use_primary
+        or session is not async_session
+        or CURRENT_SESSION.get() is not None
+        or not isinstance(query, Select)
+        or query._for_update_arg is not None
+    ):
+        return session
+
+    return async_read_session
+
+
+def _project_columns(query: Select | Insert | Update) -> Select | None:
+    """
+    Rewrite `select(Model)` into a select of the model table columns. Rows are turned
+    into dicts anyway, so there is no need to build ORM instances and load relationships.
+    """
+    if not isinstance(query, Select):
+        return None
+
+    descriptions = query.column_descriptions
+    if len(descriptions) != 1 or descriptions[0]["expr"] is not descriptions[0]["entity"]:
+        return None
+
+    return query.with_only_columns(*descriptions[0]["entity"].__table__.c)
 
 
 async def fetch_one(
@@ -11,10 +120,15 @@ async def fetch_one(
     raise_on_none: bool = False,
     session: async_sessionmaker[AsyncSession] = async_session,
     auto_commit: bool = True,
+    use_primary: bool = False,
 ) -> dict[str, Any] | None:
-    async with session() as session:
+    async with _session_scope(_route_session(query, session, use_primary)) as session:
+        if (projection := _project_columns(query)) is not None:
+            result = (await session.execute(projection)).mappings()
+            row = result.one() if raise_on_none else result.one_or_none()
+            return dict(row) if row else None
+
         result = await session.execute(query)
-        await session.commit()
 
         obj = result.scalar_one() if raise_on_none else result.scalar_one_or_none()
         return obj.asdict() if obj else None
@@ -23,19 +137,43 @@ async def fetch_one(
 async def fetch_all(
     query: Select | Insert | Update,
     session: async_sessionmaker[AsyncSession] = async_session,
+    use_primary: bool = False,
 ) -> list[dict[str, Any]]:
-    async with session() as session:
+    async with _session_scope(_route_session(query, session, use_primary)) as session:
+        if (projection := _project_columns(query)) is not None:
+            result = await session.execute(projection)
+            return [dict(row) for row in result.mappings().all()]
+
         result = await session.execute(query)
-        await session.commit()
 
         return [obj.asdict() for obj in result.scalars().all()]
 
 
+async def fetch_rows(
+    query: Select | Insert | Update,
+    session: async_sessionmaker[AsyncSession] = async_session,
+) -> list[dict[str, Any]]:
+    """Like `fetch_all`, for queries selecting or returning columns rather than entities."""
+    async with _session_scope(session) as session:
+        result = await session.execute(query)
+
+        return [dict(row) for row in result.mappings().all()]
+
+
+async def fetch_scalar(
+    query: Select | Insert | Update,
+    session: async_sessionmaker[AsyncSession] = async_session,
+) -> Any:
+    async with _session_scope(session) as session:
+        result = await session.execute(query)
+
+        return result.scalar_one_or_none()
+
+
 async def execute(
     *queries: Select | Insert | Update | Delete,
     session: async_sessionmaker[AsyncSession] = async_session,
 ) -> None:
-    async with session() as session:
+    async with _session_scope(session) as session:
         for query in queries:
             await session.execute(query)
-            await session.commit()
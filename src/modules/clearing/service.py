@@ -0,0 +1,205 @@
+import asyncio
+import logging
+
+from eth_utils import to_int
+from sqlalchemy import select, update
+from web3 import Web3
+from web3.types import TxParams
+
+from src.core.config import settings
+from src.core.rpc import RPCError, batch_request, rpc_request
+from src.database.utils import execute, fetch_all
+from src.modules.transactions.enums import GasPolicy, RawTransactionStatus
+from src.modules.transactions.models import RawTransaction
+from src.modules.transactions.service import (
+    get_fees_by_policy,
+    set_raw_transaction_to_failed,
+    sign_and_store_raw_transaction,
+)
+from src.modules.wallets.nonce import allocate_nonce, commit_nonce, release_nonce, resync_nonce
+from src.modules.wallets.service import get_deposit_list, get_wallet_by_index
+
+logger = logging.getLogger("root")
+
+TRANSFER_GAS = 21_000
+
+
+async def get_base_fee() -> int:
+    block = await rpc_request("eth_getBlockByNumber", ["latest", False])
+    return to_int(hexstr=block["baseFeePerGas"])
+
+
+async def get_balances(addresses: list[str]) -> list[int]:
+    results = await batch_request(
+        [("eth_getBalance", [address, "latest"]) for address in addresses]
+    )
+    return [to_int(hexstr=result) for result in results]
+
+
+async def get_busy_addresses() -> set[str]:
+    """Addresses with an outgoing transaction not yet mined, their balance is not final."""
+    query = select(RawTransaction).where(
+        RawTransaction.status.in_([RawTransactionStatus.CREATED, RawTransactionStatus.BROADCASTED])
+    )
+    # Sweeps broadcast by the previous run must be seen, or the wallet is swept twice.
+    raw_transactions = await fetch_all(query, use_primary=True)
+    return {raw_transaction["tx_from"] for raw_transaction in raw_transactions}
+
+
+def get_sweep_value(balance: int, fee: int) -> int | None:
+    """Value to sweep out of `balance` paying `fee`, or None if the sweep is not worth it."""
+    value = balance - fee
+
+    if value < settings.SWEEP_MIN_VALUE:
+        return None
+
+    # Fee eats too much of the balance, wait for cheaper gas or more deposits.
+    if fee * 100 > balance * settings.SWEEP_MAX_FEE_PERCENT:
+        return None
+
+    return value
+
+
+async def plan_sweeps(max_fee_per_gas: int) -> list[tuple[dict, int]]:
+    """Deposit wallets worth sweeping with the given fee, with the value to send."""
+    busy_addresses = await get_busy_addresses()
+    wallets = [
+        wallet for wallet in await get_deposit_list() if wallet["address"] not in busy_addresses
+    ]
+    balances = await get_balances([wallet["address"] for wallet in wallets])
+
+    # Worst case fee, the unspent part of max fee stays on the deposit wallet.
+    fee = TRANSFER_GAS * max_fee_per_gas
+    sweeps = []
+    for wallet, balance in zip(wallets, balances, strict=True):
+        value = get_sweep_value(balance, fee)
+
+        if value is not None:
+            sweeps.append((wallet, value))
+
+    return sweeps
+
+
+async def _sign_sweep(
+    wallet: dict,
+    value: int,
+    to_address: str,
+    max_fee_per_gas: int,
+    max_priority_fee_per_gas: int,
+) -> dict:
+    nonce = await allocate_nonce(wallet=wallet)
+
+    transaction: TxParams = {
+        "to": Web3.to_checksum_address(to_address),
+        "from": wallet["address"],
+        "value": value,
+        "gas": TRANSFER_GAS,
+        "maxFeePerGas": max_fee_per_gas,
+        "maxPriorityFeePerGas": max_priority_fee_per_gas,
+        "chainId": settings.CHAIN_ID,
+        "nonce": nonce,
+    }
+
+    try:
+        return await sign_and_store_raw_transaction(wallet=wallet, raw_transaction=transaction)
+    except Exception:
+        await release_nonce(wallet=wallet, nonce=nonce)
+        raise
+
+
+async def broadcast_sweeps(sweeps: list[tuple[dict, dict]]) -> list[dict]:
+    """
+    Send signed sweeps as JSON-RPC batches. Accepted ones are marked BROADCASTED and their
+    nonces committed, rejected ones are failed and their nonces given back.
+    """
+    results = await batch_request(
+        [("eth_sendRawTransaction", [raw_transaction["raw"]]) for _, raw_transaction in sweeps],
+        return_exceptions=True,
+    )
+
+    broadcasted = []
+    for (wallet, raw_transaction), result in zip(sweeps, results, strict=True):
+        if not isinstance(result, RPCError):
+            await commit_nonce(wallet=wallet, nonce=raw_transaction["nonce"])
+            broadcasted.append(raw_transaction)
+            continue
+
+        logger.warning(
+            f"Sweep {raw_transaction['tx_hash']} was rejected: {result.message}",
+            extra={"wallet": wallet["external_id"], "tx_hash": raw_transaction["tx_hash"]},
+        )
+        await set_raw_transaction_to_failed(raw_transaction=raw_transaction)
+
+        if "nonce too low" in str(result.message):
+            await resync_nonce(wallet=wallet)
+        else:
+            await release_nonce(wallet=wallet, nonce=raw_transaction["nonce"])
+
+    if broadcasted:
+        await execute(
+            update(RawTransaction)
+            .where(
+                RawTransaction.id.in_([raw_transaction["id"] for raw_transaction in broadcasted])
+            )
+            .values(status=RawTransactionStatus.BROADCASTED)
+            .execution_options(synchronize_session=False)
+        )
+
+    return broadcasted
+
+
+async def sweep_deposit_wallets() -> list[dict]:
+    """
+    Move funds of deposit wallets to the main wallet (index 0) while gas is cheap.
+
+    Does nothing while the base fee is above SWEEP_MAX_BASE_FEE, the beat schedule retries
+    until a low-fee window comes. Returns the broadcasted raw transactions.
+    """
+    base_fee = await get_base_fee()
+
+    if base_fee > settings.SWEEP_MAX_BASE_FEE:
+        logger.info(f"Sweep postponed, base fee {base_fee} is above {settings.SWEEP_MAX_BASE_FEE}")
+        return []
+
+    max_fee_per_gas, max_priority_fee_per_gas = await get_fees_by_policy(
+        GasPolicy(settings.SWEEP_GAS_POLICY)
+    )
+    main_wallet = await get_wallet_by_index(index=0)
+    sweeps = await plan_sweeps(max_fee_per_gas)
+
+    if not sweeps:
+        return []
+
+    # Signing runs in the signing pool, gather keeps every worker busy.
+    raw_transactions = await asyncio.gather(
+        *(
+            _sign_sweep(
+                wallet=wallet,
+                value=value,
+                to_address=main_wallet["address"],
+                max_fee_per_gas=max_fee_per_gas,
+                max_priority_fee_per_gas=max_priority_fee_per_gas,
+            )
+            for wallet, value in sweeps
+        ),
+        return_exceptions=True,
+    )
+
+    signed = []
+    for (wallet, _), raw_transaction in zip(sweeps, raw_transactions, strict=True):
+        if isinstance(raw_transaction, Exception):
+            logger.error(
+                f"Failed to sign sweep of wallet {wallet['address']}: {raw_transaction}",
+                extra={"wallet": wallet["external_id"]},
+            )
+        else:
+            signed.append((wallet, raw_transaction))
+
+    broadcasted = await broadcast_sweeps(signed)
+
+    logger.info(
+        f"Swept {len(broadcasted)}/{len(sweeps)} deposit wallets,"
+        f" {sum(raw_transaction['tx_value'] for raw_transaction in broadcasted)} wei"
+        f" at base fee {base_fee}"
+    )
+    return broadcasted
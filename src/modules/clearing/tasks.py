@@ -0,0 +1,13 @@
+import asyncio
+
+from src.celery.config import BROADCAST_QUEUE, app
+from src.modules.clearing.service import sweep_deposit_wallets
+
+
+@app.task(
+    name="sweep_deposit_wallets",
+    queue=BROADCAST_QUEUE,
+    ignore_result=True,
+)
+def sweep_deposit_wallets_task():
+    asyncio.run(sweep_deposit_wallets())
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from eth_utils import to_int
+from sqlalchemy import select
+
+from src.core.config import settings
+from src.core.rpc import RPCError, batch_request
+from src.database.redis import redis
+from src.database.utils import fetch_all
+from src.modules.wallets.models import Wallet
+from src.modules.wallets.nonce import get_next_nonces
+
+logger = logging.getLogger("root")
+
+RECONCILIATION_REPORT_KEY = "EWS:reconciliation:last_report"
+
+
+async def get_wallets_chunk(after_id: int, limit: int) -> list[dict]:
+    # Keyset pagination, every chunk is an index range scan whatever the offset.
+    query = select(Wallet).where(Wallet.id > after_id).order_by(Wallet.id).limit(limit)
+    return await fetch_all(query)
+
+
+async def get_chain_state(wallets: list[dict]) -> list[tuple[int, int] | RPCError]:
+    """
+    Balance and pending transaction count of every wallet, in one batched round trip.
+    Wallets the node failed to answer for get the `RPCError` instead.
+    """
+    calls = []
+    for wallet in wallets:
+        calls.append(("eth_getBalance", [wallet["address"], "latest"]))
+        calls.append(("eth_getTransactionCount", [wallet["address"], "pending"]))
+
+    results = await batch_request(calls, return_exceptions=True)
+
+    chain_state = []
+    for balance, nonce in zip(results[::2], results[1::2], strict=True):
+        if isinstance(balance, RPCError) or isinstance(nonce, RPCError):
+            chain_state.append(balance if isinstance(balance, RPCError) else nonce)
+        else:
+            chain_state.append((to_int(hexstr=balance), to_int(hexstr=nonce)))
+
+    return chain_state
+
+
+def _mismatch(wallet: dict, field: str, expected: int | str, actual: int | None) -> dict:
+    return {
+        "external_id": wallet["external_id"],
+        "address": wallet["address"],
+        "field": field,
+        "chain": expected,
+        "system": actual,
+    }
+
+
+def rpc_error_mismatch(wallet: dict, error: Exception) -> dict:
+    """Wallet that could not be checked, reported instead of failing the whole run."""
+    message = error.message if isinstance(error, RPCError) else str(error)
+    return _mismatch(wallet, "rpc_error", str(message), None)
+
+
+def diff_wallet(wallet: dict, balance: int, nonce: int, next_nonce: int | None) -> list[dict]:
+    mismatches = []
+
+    def mismatch(field: str, expected: int, actual: int) -> None:
+        mismatches.append(_mismatch(wallet, field, expected, actual))
+
+    # Ledger counts mined transactions, confirmed or not.
+    ledger_balance = int(wallet["confirmed_balance"] + wallet["pending_balance"])
+    if ledger_balance != balance:
+        mismatch("balance", balance, ledger_balance)
+
+    if wallet["nonce"] != nonce:
+        mismatch("nonce", nonce, wallet["nonce"])
+
+    # Counter ahead of the node is fine while transactions are in flight, behind never is.
+    if next_nonce is not None and next_nonce < nonce:
+        mismatch("redis_nonce", nonce, next_nonce)
+
+    return mismatches
+
+
+async def reconcile_chunk(wallets: list[dict], semaphore: asyncio.Semaphore) -> list[dict]:
+    async with semaphore:
+        chain_state, next_nonces = await asyncio.gather(
+            get_chain_state(wallets), get_next_nonces(wallets)
+        )
+
+    mismatches = []
+    for wallet, state, next_nonce in zip(wallets, chain_state, next_nonces, strict=True):
+        if isinstance(state, RPCError):
+            mismatches.append(rpc_error_mismatch(wallet, state))
+        else:
+            balance, nonce = state
+            mismatches.extend(diff_wallet(wallet, balance, nonce, next_nonce))
+
+    return mismatches
+
+
+async def reconcile_wallets() -> dict:
+    """
+    Compare balance and nonce of every wallet in the system (ledger, `wallet.nonce`, Redis
+    nonce counter) with the chain and store the report in Redis.
+
+    Wallets are read in keyset chunks of RECONCILIATION_CHUNK_SIZE, every chunk is checked
+    with one batched JSON-RPC round trip and up to RECONCILIATION_CONCURRENCY chunks are in
+    flight at once, while the next ones are being read from the database.
+    """
+    started_at = datetime.utcnow()
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(settings.RECONCILIATION_CONCURRENCY)
+
+    chunks = []
+    tasks = []
+    wallets_count = 0
+    last_id = 0
+    while wallets := await get_wallets_chunk(last_id, settings.RECONCILIATION_CHUNK_SIZE):
+        last_id = wallets[-1]["id"]
+        wallets_count += len(wallets)
+        chunks.append(wallets)
+        tasks.append(asyncio.create_task(reconcile_chunk(wallets, semaphore)))
+
+    mismatches = []
+    # A failed chunk (node unreachable, whole batch rejected) must not lose the others.
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for wallets, result in zip(chunks, results, strict=True):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to reconcile {len(wallets)} wallets: {result}")
+            mismatches.extend(rpc_error_mismatch(wallet, result) for wallet in wallets)
+        else:
+            mismatches.extend(result)
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "duration": round(time.monotonic() - started, 3),
+        "wallets": wallets_count,
+        "mismatched_wallets": len({mismatch["external_id"] for mismatch in mismatches}),
+        "mismatches": mismatches,
+    }
+    await redis.set(RECONCILIATION_REPORT_KEY, json.dumps(report))
+
+    for mismatch in mismatches:
+        logger.warning(
+            f"Reconciliation mismatch of {mismatch['field']} for wallet {mismatch['address']}:"
+            f" chain={mismatch['chain']}, system={mismatch['system']}",
+            extra={"wallet": mismatch["external_id"]},
+        )
+    logger.info(
+        f"Reconciled {wallets_count} wallets in {report['duration']}s,"
+        f" {report['mismatched_wallets']} mismatched"
+    )
+
+    return report
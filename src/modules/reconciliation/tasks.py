@@ -0,0 +1,13 @@
+import asyncio
+
+from src.celery.config import WALLETS_QUEUE, app
+from src.modules.reconciliation.service import reconcile_wallets
+
+
+@app.task(
+    name="reconcile_wallets",
+    queue=WALLETS_QUEUE,
+    ignore_result=True,
+)
+def reconcile_wallets_task():
+    asyncio.run(reconcile_wallets())
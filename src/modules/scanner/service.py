@@ -1,95 +1,162 @@
+import asyncio
 import logging
 import signal
+import time
+from collections import deque
+from collections.abc import AsyncIterator
 
-from web3.types import TxData
+from web3.types import BlockData, TxData
 
-from src.core.config import w3_obj
+from src.core.config import settings, w3_obj
 from src.core.utils import signal_fence
 from src.database.redis import redis
-from src.modules.scanner.utils import build_map_from_list_of_dicts
-from src.modules.transactions.enums import RawTransactionStatus
+from src.database.utils import unit_of_work
+from src.modules.transactions.enums import TransactionDirection
+from src.modules.transactions.oracle import refresh_gas_oracle
 from src.modules.transactions.service import (
-    confirm_raw_transaction_by_blockchain,
-    create_system_transaction,
-    get_raw_transaction_by_hash,
-    get_raw_transactions_by_status,
-    insert_raw_transaction_from_blockchain,
+    confirm_pending_raw_transactions,
+    create_system_transactions,
+    drop_replaced_raw_transactions,
+    upsert_raw_transactions_from_blockchain,
 )
-from src.modules.wallets.service import get_wallet_by_address
+from src.modules.transactions.utils import get_block_receipts
+from src.modules.wallets.watchlist import watched_addresses
 
 logger = logging.getLogger("root")
 
 
-async def confirm_block(block_number: int) -> None:
+async def get_block(block_number: int) -> BlockData:
+    return await w3_obj.eth.get_block(block_number, full_transactions=True)
+
+
+async def prefetch_blocks(
+    from_block: int,
+    to_block: int,
+    window: int = settings.SCANNER_PREFETCH_WINDOW,
+) -> AsyncIterator[BlockData]:
+    """
+    Yield blocks from `from_block` to `to_block` (inclusive) strictly in order, while keeping
+    up to `window` block fetches in flight ahead of the consumer.
+    """
+    in_flight: deque[asyncio.Task[BlockData]] = deque()
+    next_block = from_block
+
+    try:
+        while in_flight or next_block <= to_block:
+            while next_block <= to_block and len(in_flight) < max(window, 1):
+                in_flight.append(asyncio.create_task(get_block(next_block)))
+                next_block += 1
+
+            yield await in_flight.popleft()
+    finally:
+        # Consumer stopped early (error or cancellation), drop fetches nobody will read.
+        for task in in_flight:
+            task.cancel()
+
+
+async def confirm_block(block_number: int, block_info: BlockData | None = None) -> None:
     logger.info(f"Confirming block {block_number}", extra={"block_number": block_number})
 
-    block_info = await w3_obj.eth.get_block(block_number, full_transactions=True)
+    if block_info is None:
+        block_info = await get_block(block_number)
 
     logger.info(
         f"Found {len(block_info.get('transactions'))} transactions in block {block_number}",
         extra={"block_number": block_number},
     )
 
-    # Map transaction hash to raw transaction object to decrease big O complexity.
-    pending_transactions = build_map_from_list_of_dicts(
-        list_of_dicts=await get_raw_transactions_by_status(statuses=[RawTransactionStatus.PENDING]),
-        key="tx_hash",
+    # Pick up wallets issued by other processes since the last block.
+    await watched_addresses.refresh()
+
+    # Select transactions related to our system first, so receipts can be fetched for the
+    # whole block at once.
+    detected_transactions: list[tuple[TxData, dict | None, dict | None]] = []
+    for transaction in block_info.get("transactions"):
+        transaction: TxData
+        wallet_from = watched_addresses.get(transaction.get("from"))
+        wallet_to = watched_addresses.get(transaction.get("to"))
+
+        if wallet_from or wallet_to:
+            detected_transactions.append((transaction, wallet_from, wallet_to))
+
+    tx_receipts = await get_block_receipts(
+        w3_obj,
+        block_number=block_number,
+        tx_hashes=[transaction["hash"].hex() for transaction, _, _ in detected_transactions],
     )
 
     with signal_fence(signal.SIGINT):
-        for transaction in block_info.get("transactions"):
-            tx_hash = transaction.get("hash").hex()
-            logger.debug(
-                f"Processing transaction {transaction.get('hash').hex()}",
-                extra={"block_number": block_number},
-            )
-            transaction: TxData
-
-            # In this stage raw transaction only have a broadcasted status
-
-            wallet_from = await get_wallet_by_address(transaction.get("from"))
-            wallet_to = await get_wallet_by_address(transaction.get("to"))
-
-            if wallet_from or wallet_to:
-                # Means that transaction is related to our system.
-                # We need to create raw and system transactions.
-                logger.debug(
-                    f"Detected transaction {tx_hash}", extra={"block_number": block_number}
-                )
-
-                broadcasted_transaction = await get_raw_transaction_by_hash(tx_hash)
-                if not broadcasted_transaction:
-                    pending_transaction = await insert_raw_transaction_from_blockchain(transaction)
-                else:
-                    pending_transaction = await confirm_raw_transaction_by_blockchain(
-                        raw_transaction=broadcasted_transaction,
-                        confirmations=1,
-                        blockchain_tx_data=transaction,
-                    )
-
-                if wallet_from:
-                    await create_system_transaction(pending_transaction, wallet_from)
-
-                if wallet_to:
-                    await create_system_transaction(pending_transaction, wallet_to)
+        # Means that transactions are related to our system.
+        # We need to create raw and system transactions, one statement for each per block.
+        raw_transactions = await upsert_raw_transactions_from_blockchain(
+            [
+                (transaction, tx_receipts[transaction["hash"].hex()])
+                for transaction, _, _ in detected_transactions
+            ]
+        )
+
+        # Other transactions of ours at a mined nonce, originals or replacements, are void.
+        await drop_replaced_raw_transactions(
+            [
+                raw_transactions[transaction["hash"].hex()]
+                for transaction, wallet_from, _ in detected_transactions
+                if wallet_from
+            ]
+        )
+
+        system_transactions = []
+        for transaction, wallet_from, wallet_to in detected_transactions:
+            raw_transaction = raw_transactions[transaction["hash"].hex()]
+
+            if wallet_from:
+                system_transactions.append((raw_transaction, wallet_from, TransactionDirection.OUT))
+
+            if wallet_to:
+                system_transactions.append((raw_transaction, wallet_to, TransactionDirection.IN))
+
+        await create_system_transactions(system_transactions)
 
         # Confirm pending transactions
-        for pending_transaction in pending_transactions.values():
-            confirmations = 1
+        await confirm_pending_raw_transactions(block_number)
 
-            block_number_delta = block_number - pending_transaction["block_number"]
-            confirmations_left = (
-                pending_transaction["confirmation_need"] - pending_transaction["confirmation_count"]
-            )
+    logger.info(f"Block {block_number} confirmed", extra={"block_number": block_number})
 
-            if block_number_delta > confirmations_left:
-                confirmations = confirmations_left
 
-            await confirm_raw_transaction_by_blockchain(
-                raw_transaction=pending_transaction, confirmations=confirmations
-            )
+async def run_scanner() -> None:
+    last_scanned_block = await get_last_scanned_block()
+    latest_block = await w3_obj.eth.get_block("latest")
 
-    logger.info(f"Block {block_number} confirmed", extra={"block_number": block_number})
+    if last_scanned_block is None:
+        # First run.
+        last_scanned_block = latest_block["number"]
+        await set_last_scanned_block(last_scanned_block)
+
+    from_block = last_scanned_block + 1
+    to_block = latest_block["number"]
+    if from_block > to_block:
+        return
+
+    started_at = time.monotonic()
+    async for block_info in prefetch_blocks(from_block, to_block):
+        # Whole block is committed at once, a crash in the middle leaves no partial state.
+        async with unit_of_work():
+            await confirm_block(block_info["number"], block_info=block_info)
+
+        await set_last_scanned_block(block_info["number"])
+
+    # Fees only change once per block, refresh them for everybody at the new head.
+    try:
+        await refresh_gas_oracle(to_block)
+    except Exception as exc:
+        logger.exception(f"Failed to refresh gas oracle: {exc}", extra={"block_number": to_block})
+
+    blocks_count = to_block - from_block + 1
+    elapsed = time.monotonic() - started_at
+    logger.info(
+        f"Scanned {blocks_count} blocks ({from_block}..{to_block}) in {elapsed:.2f}s,"
+        f" {blocks_count / elapsed if elapsed else blocks_count:.2f} blocks/sec",
+        extra={"block_number": to_block},
+    )
 
 
 async def set_last_scanned_block(block_number: int) -> None:
@@ -24,6 +24,7 @@ RAW_SYSTEM_TX_STATUS_MAPPING = {
     RawTransactionStatus.PENDING: TransactionStatus.PENDING,
     RawTransactionStatus.CONFIRMED: TransactionStatus.CONFIRMED,
     RawTransactionStatus.FAILED: TransactionStatus.FAILED,
+    RawTransactionStatus.DROPPED_AND_REPLACED: TransactionStatus.CANCELLED,
 }
 
 
@@ -1,7 +1,19 @@
-from sqlalchemy import BigInteger, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database.base import BaseModel
+from src.database.types import AddressBinary, HexBinary, Wei
 from src.modules.transactions.enums import (
     RawTransactionStatus,
     TransactionDirection,
@@ -11,17 +23,35 @@ from src.modules.transactions.enums import (
 
 class RawTransaction(BaseModel):
     __tablename__ = "raw_transaction"
+    __table_args__ = (
+        # Conflict target of the scanner upsert, a transaction is stored once.
+        Index("ix_raw_transaction_tx_hash", "tx_hash", unique=True),
+        Index("ix_raw_transaction_tx_from_status", "tx_from", "status"),
+        # Only transactions still moving through the pipeline, terminal ones pile up forever.
+        Index(
+            "ix_raw_transaction_active_status",
+            "status",
+            postgresql_where=text("status IN ('CREATED', 'BROADCASTED', 'PENDING')"),
+        ),
+        # Finalized transactions by age, picked up by the archiver.
+        Index(
+            "ix_raw_transaction_finalized_updated_at",
+            "updated_at",
+            postgresql_where=text("status IN ('CONFIRMED', 'FAILED', 'DROPPED_AND_REPLACED')"),
+        ),
+    )
 
     status: Mapped[RawTransactionStatus] = mapped_column(
         String(50), nullable=False, default=RawTransactionStatus.CREATED
     )
 
-    tx_hash: Mapped[str] = mapped_column(String(255), nullable=False)
-    tx_from: Mapped[str] = mapped_column(String(255), nullable=False)
-    tx_to: Mapped[str] = mapped_column(String(255), nullable=False)
-    tx_value: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    tx_fee: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
-    tx_input: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Stored as bytes and NUMERIC, read and written as hex strings and ints.
+    tx_hash: Mapped[str] = mapped_column(HexBinary, nullable=False)
+    tx_from: Mapped[str] = mapped_column(AddressBinary, nullable=False)
+    tx_to: Mapped[str] = mapped_column(AddressBinary, nullable=False)
+    tx_value: Mapped[int] = mapped_column(Wei, nullable=False)
+    tx_fee: Mapped[int | None] = mapped_column(Wei, nullable=True)
+    tx_input: Mapped[str | None] = mapped_column(HexBinary, nullable=True)
 
     gas_price: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     gas_limit: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -29,14 +59,14 @@ class RawTransaction(BaseModel):
 
     nonce: Mapped[int] = mapped_column(Integer, nullable=True)
     block_number: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    replaced_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    replaced_by: Mapped[str | None] = mapped_column(HexBinary, nullable=True)
 
     confirmation_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     confirmation_need: Mapped[int] = mapped_column(Integer, nullable=False, default=12)
 
     contract_method: Mapped[str | None] = mapped_column(String(255), nullable=True)
     parsed_input: Mapped[dict | None] = mapped_column(Text, nullable=True)
-    raw: Mapped[str | None] = mapped_column(Text, nullable=True)
+    raw: Mapped[str | None] = mapped_column(HexBinary, nullable=True)
 
     # EIP-1559
     base_fee_per_gas: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
@@ -44,18 +74,28 @@ class RawTransaction(BaseModel):
     max_priority_fee_per_gas: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
     system_transactions: Mapped[list["SystemTransaction"]] = relationship(
-        "SystemTransaction", back_populates="origin", cascade="all, delete-orphan", lazy="selectin"
+        "SystemTransaction", back_populates="origin", cascade="all, delete-orphan", lazy="raise"
     )
 
 
 class SystemTransaction(BaseModel):
     __tablename__ = "system_transaction"
+    __table_args__ = (
+        # Also serves lookups by origin_id. Rescanning a block must not create duplicates.
+        UniqueConstraint(
+            "origin_id",
+            "wallet_id",
+            "direction",
+            name="uq_system_transaction_origin_id_wallet_id_direction",
+        ),
+        Index("ix_system_transaction_wallet_id", "wallet_id"),
+    )
 
     origin_id: Mapped[int] = mapped_column(ForeignKey("raw_transaction.id"), unique=False)
     wallet_id: Mapped[int] = mapped_column(ForeignKey("wallet.id"), unique=False)
 
     origin: Mapped[RawTransaction] = relationship(
-        "RawTransaction", back_populates="system_transactions", lazy="selectin"
+        "RawTransaction", back_populates="system_transactions", lazy="raise"
     )
 
     amount: Mapped[str] = mapped_column(Text, nullable=False)
@@ -63,3 +103,31 @@ class SystemTransaction(BaseModel):
         String(50), nullable=False, default=TransactionStatus.CREATED
     )
     direction: Mapped[TransactionDirection] = mapped_column(String(50), nullable=False)
+
+
+def _archive_table(table: Table) -> Table:
+    """
+    Cold copy of `table` for finalized rows, partitioned by month of `created_at`.
+    No foreign keys or unique constraints, rows only get there once they never change.
+    """
+    return Table(
+        f"{table.name}_archive",
+        table.metadata,
+        *(
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.name in ("id", "created_at"),
+                nullable=column.nullable,
+            )
+            for column in table.c
+        ),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+
+
+raw_transaction_archive = _archive_table(RawTransaction.__table__)
+system_transaction_archive = _archive_table(SystemTransaction.__table__)
+
+Index("ix_raw_transaction_archive_tx_hash", raw_transaction_archive.c.tx_hash)
+Index("ix_system_transaction_archive_wallet_id", system_transaction_archive.c.wallet_id)
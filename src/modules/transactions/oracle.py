@@ -0,0 +1,62 @@
+import json
+import logging
+import time
+
+from src.core.config import settings, w3_obj
+from src.database.redis import redis
+from src.modules.transactions.utils import estimate_fees
+
+logger = logging.getLogger("root")
+
+GAS_ORACLE_KEY = "EWS:gas_oracle"
+
+# Last oracle value seen by this process and the monotonic time it was read at.
+_gas_oracle: dict | None = None
+_gas_oracle_read_at: float = 0.0
+
+
+def _remember(oracle: dict) -> dict:
+    global _gas_oracle, _gas_oracle_read_at
+
+    _gas_oracle = oracle
+    _gas_oracle_read_at = time.monotonic()
+    return oracle
+
+
+async def refresh_gas_oracle(block_number: int | None = None) -> dict:
+    """
+    Recompute fees for every gas policy from the fee history window and publish them to
+    Redis for other processes. Meant to be called once per new head.
+    """
+    fees = await estimate_fees(w3_obj, blocks=settings.GAS_ORACLE_HISTORY_BLOCKS)
+
+    oracle = {
+        "block_number": block_number,
+        **{
+            gas_policy.value: {
+                "max_fee_per_gas": max_fee_per_gas,
+                "max_priority_fee_per_gas": max_priority_fee_per_gas,
+            }
+            for gas_policy, (max_fee_per_gas, max_priority_fee_per_gas) in fees.items()
+        },
+    }
+
+    await redis.set(GAS_ORACLE_KEY, json.dumps(oracle), ex=settings.GAS_ORACLE_MAX_AGE)
+    logger.debug(f"Gas oracle refreshed: {oracle}", extra={"block_number": block_number})
+    return _remember(oracle)
+
+
+async def get_gas_oracle() -> dict:
+    if (
+        _gas_oracle is not None
+        and time.monotonic() - _gas_oracle_read_at < settings.GAS_ORACLE_LOCAL_TTL
+    ):
+        return _gas_oracle
+
+    cached_oracle = await redis.get(GAS_ORACLE_KEY)
+    if cached_oracle is not None:
+        return _remember(json.loads(cached_oracle))
+
+    # Nobody refreshed the oracle recently (scanner is down or lagging).
+    logger.warning("Gas oracle is stale, refreshing it from the node")
+    return await refresh_gas_oracle()
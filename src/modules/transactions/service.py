@@ -1,38 +1,59 @@
 import logging
+from datetime import datetime, timedelta
+from typing import Any
 
-import web3.exceptions
-from eth_account.datastructures import SignedTransaction
 from hexbytes import HexBytes
-from sqlalchemy import insert, select, update
+from sqlalchemy import (
+    CTE,
+    ColumnElement,
+    Insert,
+    Integer,
+    Table,
+    case,
+    column,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from web3 import Web3
-from web3.types import TxData
+from web3.types import TxData, TxParams, TxReceipt
 
 from src.core.config import settings, w3_obj
-from src.database.utils import execute, fetch_all, fetch_one
+from src.core.rpc import batch_request, rpc_request
+from src.database.types import AddressBinary, HexBinary
+from src.database.utils import execute, fetch_all, fetch_one, fetch_rows, fetch_scalar, unit_of_work
 from src.modules.transactions.enums import (
     RAW_SYSTEM_TX_STATUS_MAPPING,
     GasPolicy,
     RawTransactionStatus,
     TransactionDirection,
-    TransactionStatus,
 )
 from src.modules.transactions.exceptions import NonceIsTooLow, ReplacementTransactionUnderpriced
-from src.modules.transactions.models import RawTransaction, SystemTransaction
-from src.modules.transactions.utils import get_gas_from_history
+from src.modules.transactions.models import (
+    RawTransaction,
+    SystemTransaction,
+    raw_transaction_archive,
+    system_transaction_archive,
+)
+from src.modules.transactions.oracle import get_gas_oracle
+from src.modules.transactions.utils import sign_transaction
+from src.modules.wallets.ledger import apply_balance_changes
+from src.modules.wallets.models import Wallet
 
 logger = logging.getLogger("root")
 
+RAW_TX_INSERT_CHUNK_SIZE = 1_000
 
-async def get_gas_price_by_policy(gas_policy: GasPolicy) -> int:
-    min_, avg, max_ = await get_gas_from_history(w3_obj)
-
-    policies = {
-        GasPolicy.STANDARD: min_,
-        GasPolicy.FAST: avg,
-        GasPolicy.FASTEST: max_,
-    }
 
-    return policies[gas_policy]
+async def get_fees_by_policy(gas_policy: GasPolicy) -> tuple[int, int]:
+    """Return (max_fee_per_gas, max_priority_fee_per_gas) for the gas policy."""
+    fees = (await get_gas_oracle())[gas_policy.value]
+    return fees["max_fee_per_gas"], fees["max_priority_fee_per_gas"]
 
 
 async def get_raw_transaction_by_id(obj_id: int) -> dict:
@@ -40,11 +61,6 @@ async def get_raw_transaction_by_id(obj_id: int) -> dict:
     return await fetch_one(query)
 
 
-async def get_system_transactions_by_raw_tx(raw_transaction: dict) -> list[dict]:
-    query = select(SystemTransaction).where(SystemTransaction.origin_id == raw_transaction["id"])
-    return await fetch_all(query)
-
-
 async def get_raw_transaction_by_external_id(external_id: str) -> dict:
     query = select(RawTransaction).where(RawTransaction.external_id == external_id)
     return await fetch_one(query)
@@ -55,169 +71,181 @@ async def get_raw_transaction_by_hash(tx_hash: str) -> dict:
     return await fetch_one(query)
 
 
-async def get_raw_transactions_by_status(statuses: list[RawTransactionStatus]) -> list[dict]:
-    query = select(RawTransaction).where(RawTransaction.status.in_(statuses))
-    return await fetch_all(query)
+async def confirm_pending_raw_transactions(block_number: int) -> list[dict]:
+    """
+    Move confirmations of all PENDING raw transactions to `block_number` as the chain head.
 
+    Confirmations are derived from `head - block_number + 1`, so transactions below their
+    `confirmation_need` are updated with a single statement. Only transactions crossing the
+    threshold are re-checked on the blockchain (in one JSON-RPC batch) before they are
+    confirmed together with their system transactions. Returns confirmed raw transactions.
 
-async def get_blocking_raw_transaction(wallet: dict) -> dict:
-    query = select(RawTransaction).where(
-        RawTransaction.status == RawTransactionStatus.BROADCASTED,
-        RawTransaction.tx_from == wallet["address"],
+    Transactions the node does not know anymore (reorged out, or a lagging node) go back to
+    BROADCASTED: the scanner moves them to PENDING again once they are mined, and the
+    accelerator re-broadcasts our own if they are not.
+    """
+    confirmations = block_number - RawTransaction.block_number + 1
+
+    query = (
+        update(RawTransaction)
+        .where(
+            RawTransaction.status == RawTransactionStatus.PENDING,
+            confirmations < RawTransaction.confirmation_need,
+        )
+        .values({"confirmation_count": confirmations})
+        .execution_options(synchronize_session=False)
     )
-    return await fetch_one(query)
+    await execute(query)
 
+    query = select(RawTransaction).where(
+        RawTransaction.status == RawTransactionStatus.PENDING,
+        confirmations >= RawTransaction.confirmation_need,
+    )
+    crossed_transactions = await fetch_all(query)
 
-async def get_blockchain_transaction_from_raw(raw_transaction: dict) -> TxData:
-    try:
-        return await w3_obj.eth.get_transaction(raw_transaction["tx_hash"])
-    except web3.exceptions.TransactionNotFound as exc:
-        # Set raw and system transactions to failed
-        await set_raw_transaction_to_failed(raw_transaction)
-        raise ValueError(
-            f"Transaction {raw_transaction['tx_hash']} not found on blockchain"
-        ) from exc
+    if not crossed_transactions:
+        return []
 
+    # Check if transactions are still available on blockchain
+    blockchain_transactions = await batch_request(
+        [("eth_getTransactionByHash", [tx["tx_hash"]]) for tx in crossed_transactions]
+    )
 
-async def confirm_raw_transaction_by_blockchain(
-    raw_transaction: dict,
-    confirmations: int,
-    blockchain_tx_data: TxData | None = None,
-) -> dict:
-    if raw_transaction["status"] == RawTransactionStatus.BROADCASTED:
-        # Transaction is on broadcast status. This means that
-        # it is the first time we are confirming this transaction
-
-        if not blockchain_tx_data:
-            blockchain_tx_data = await get_blockchain_transaction_from_raw(raw_transaction)
-
-        tx_receipt = await w3_obj.eth.get_transaction_receipt(blockchain_tx_data["hash"])
-
-        updatable = {
-            "status": RawTransactionStatus.PENDING,
-            "tx_hash": blockchain_tx_data["hash"].hex(),
-            "tx_from": blockchain_tx_data["from"],
-            "tx_to": blockchain_tx_data["to"],
-            "tx_value": blockchain_tx_data["value"],
-            "tx_fee": tx_receipt["gasUsed"] * tx_receipt["effectiveGasPrice"],
-            "tx_input": blockchain_tx_data["input"].hex(),
-            "gas_used": tx_receipt["gasUsed"],
-            "block_number": blockchain_tx_data["blockNumber"],
-            "confirmation_count": raw_transaction["confirmation_count"] + confirmations,
-        }
-    else:
-        # Transaction is on pending status
-        updatable = {
-            "confirmation_count": raw_transaction["confirmation_count"] + confirmations,
-        }
-
-        if (
-            raw_transaction["confirmation_count"] + confirmations
-            >= raw_transaction["confirmation_need"]
-        ):
-            # Check if transaction is still available on blockchain
-            await get_blockchain_transaction_from_raw(raw_transaction)
-
-    if (
-        raw_transaction["confirmation_count"] + confirmations
-        >= raw_transaction["confirmation_need"]
+    confirmed_ids = []
+    missing_ids = []
+    for raw_transaction, blockchain_tx_data in zip(
+        crossed_transactions, blockchain_transactions, strict=True
     ):
-        updatable["status"] = RawTransactionStatus.CONFIRMED
+        if blockchain_tx_data is None:
+            logger.warning(
+                f"Transaction {raw_transaction['tx_hash']} not found on blockchain,"
+                " waiting for it to be mined again",
+                extra={"tx_hash": raw_transaction["tx_hash"]},
+            )
+            missing_ids.append(raw_transaction["id"])
+        else:
+            confirmed_ids.append(raw_transaction["id"])
+
+    if missing_ids:
+        await transition_raw_transactions(
+            RawTransactionStatus.BROADCASTED,
+            RawTransaction.id.in_(missing_ids),
+            confirmation_count=0,
+        )
 
-    query = (
-        update(RawTransaction)
-        .where(RawTransaction.id == raw_transaction["id"])
-        .values(updatable)
-        .returning(RawTransaction)
+    if not confirmed_ids:
+        return []
+
+    confirmed_transactions = await transition_raw_transactions(
+        RawTransactionStatus.CONFIRMED,
+        RawTransaction.id.in_(confirmed_ids),
+        confirmation_count=RawTransaction.confirmation_need,
+    )
+
+    logger.debug(
+        f"Confirmed {len(confirmed_transactions)} raw transactions at block {block_number}",
+        extra={"block_number": block_number},
     )
 
-    result = await fetch_one(query)
+    return confirmed_transactions
+
+
+def _group_transitioned_rows(rows: list[dict]) -> list[dict]:
+    raw_transactions: dict[int, dict] = {}
+
+    for row in rows:
+        raw_transaction = raw_transactions.setdefault(
+            row["id"],
+            {
+                **{column.name: row[column.name] for column in RawTransaction.__table__.c},
+                "system_transactions": [],
+            },
+        )
 
-    # If status was changed we need to change status of system transactions
-    if updatable.get("status"):
-        system_transaction_status = RAW_SYSTEM_TX_STATUS_MAPPING[updatable["status"]]
-        query = (
-            update(SystemTransaction)
-            .where(SystemTransaction.origin_id == raw_transaction["id"])
-            .values(
+        if row["system_transaction_id"] is not None:
+            raw_transaction["system_transactions"].append(
                 {
-                    "status": system_transaction_status,
+                    **{
+                        column.name: row[f"system_transaction_{column.name}"]
+                        for column in SystemTransaction.__table__.c
+                    },
+                    "previous_status": row["system_transaction_previous_status"],
+                    "tx_fee": raw_transaction["tx_fee"],
                 }
             )
-        )
-        await execute(query)
 
-    logger.debug(
-        f"Raw transaction {raw_transaction['tx_hash']} was confirmed: "
-        f"{raw_transaction['confirmation_count'] + confirmations}/"
-        f"{raw_transaction['confirmation_need']}",
-        extra={"tx_hash": raw_transaction["tx_hash"]},
+    return list(raw_transactions.values())
+
+
+async def transition_raw_transactions(
+    status: RawTransactionStatus, *criteria: ColumnElement[bool], **values: Any
+) -> list[dict]:
+    """
+    Move raw transactions matching `criteria` to `status` (setting `values` as well) and
+    their system transactions to the mapped status, with one statement:
+
+        WITH raw AS (UPDATE raw_transaction ... RETURNING ...),
+             children AS (UPDATE system_transaction ... FROM raw ... RETURNING ...)
+        SELECT ... FROM raw LEFT JOIN children
+
+    Wallet balances are moved in the same database transaction. Returns the updated raw
+    transactions, each with its `system_transactions` (with `previous_status`).
+    """
+    raw_table = RawTransaction.__table__
+    system_table = SystemTransaction.__table__
+    previous = system_table.alias("previous")
+    # Set explicitly, otherwise both UPDATEs add an `updated_at` onupdate parameter of the
+    # same name and the statement fails to compile.
+    updated_at = datetime.utcnow()
+
+    raw_cte = (
+        update(raw_table)
+        .where(*criteria)
+        .values({**values, "status": status, "updated_at": updated_at})
+        .returning(*raw_table.c)
+        .cte("raw")
     )
+    # FROM items are read before the update, `previous` still holds the old status.
+    children_cte = (
+        update(system_table)
+        .where(system_table.c.origin_id == raw_cte.c.id, previous.c.id == system_table.c.id)
+        .values({"status": RAW_SYSTEM_TX_STATUS_MAPPING[status], "updated_at": updated_at})
+        .returning(*system_table.c, previous.c.status.label("previous_status"))
+        .cte("children")
+    )
+    query = select(
+        *raw_cte.c,
+        *(column.label(f"system_transaction_{column.name}") for column in children_cte.c),
+    ).outerjoin_from(raw_cte, children_cte, children_cte.c.origin_id == raw_cte.c.id)
+
+    async with unit_of_work():
+        raw_transactions = _group_transitioned_rows(await fetch_rows(query))
+        await apply_balance_changes(
+            [
+                system_transaction
+                for raw_transaction in raw_transactions
+                for system_transaction in raw_transaction["system_transactions"]
+            ]
+        )
 
-    return result
+    return raw_transactions
 
 
 async def update_raw_transaction_status(
     raw_transaction: dict,
     status: RawTransactionStatus,
-):
-    system_transaction_status = RAW_SYSTEM_TX_STATUS_MAPPING[status]
-
-    queries = [
-        (
-            update(RawTransaction)
-            .where(RawTransaction.id == raw_transaction["id"])
-            .values(
-                {
-                    "status": status,
-                }
-            )
-            .returning(RawTransaction)
-        ),
-        (
-            update(SystemTransaction)
-            .where(SystemTransaction.origin_id == raw_transaction["id"])
-            .values(
-                {
-                    "status": system_transaction_status,
-                }
-            )
-        ),
-    ]
-
-    await execute(*queries)
-
-    return await get_raw_transaction_by_hash(raw_transaction["tx_hash"])
-
+    replaced_by: str | None = None,
+) -> dict:
+    values = {"replaced_by": replaced_by} if replaced_by else {}
 
-async def set_raw_transaction_to_failed(raw_transaction: dict) -> dict:
-    query = (
-        update(RawTransaction)
-        .where(RawTransaction.id == raw_transaction["id"])
-        .values(
-            {
-                "status": RawTransactionStatus.FAILED,
-            }
-        )
-        .returning(RawTransaction)
+    (raw_transaction,) = await transition_raw_transactions(
+        status, RawTransaction.id == raw_transaction["id"], **values
     )
+    return raw_transaction
 
-    raw_transaction = {**await fetch_one(query), "system_transactions": []}
 
-    for system_transaction in await get_system_transactions_by_raw_tx(raw_transaction):
-        query = (
-            update(SystemTransaction)
-            .where(SystemTransaction.id == system_transaction["id"])
-            .values(
-                {
-                    "status": TransactionStatus.FAILED,
-                }
-            )
-            .returning(SystemTransaction)
-        )
-        raw_transaction["system_transactions"].append(await fetch_one(query))
-
-    return raw_transaction
+async def set_raw_transaction_to_failed(raw_transaction: dict) -> dict:
+    return await update_raw_transaction_status(raw_transaction, RawTransactionStatus.FAILED)
 
 
 async def create_raw_transaction(
@@ -233,10 +261,8 @@ async def create_raw_transaction(
     )
 
     value = Web3.to_wei(amount, "ether")
-    wallet_account = wallet["account"]
     from_address = wallet["address"]
-    max_fee_per_gas = await get_gas_price_by_policy(gas_policy)
-    max_priority_fee_per_gas = Web3.to_wei("0.05", "gwei")
+    max_fee_per_gas, max_priority_fee_per_gas = await get_fees_by_policy(gas_policy)
 
     raw_transaction = {
         "to": Web3.to_checksum_address(transaction_to),
@@ -254,12 +280,17 @@ async def create_raw_transaction(
         extra={"wallet": wallet["external_id"]},
     )
 
-    signed_tx: SignedTransaction = wallet_account.sign_transaction(raw_transaction)
+    return await sign_and_store_raw_transaction(wallet=wallet, raw_transaction=raw_transaction)
+
+
+async def sign_and_store_raw_transaction(wallet: dict, raw_transaction: TxParams) -> dict:
+    # Signing is CPU-bound, it runs in the signing pool so the event loop keeps serving.
+    tx_hash, signed_raw = await sign_transaction(index=wallet["index"], transaction=raw_transaction)
     logger.debug(
-        f"Raw transaction was signed, tx={signed_tx}",
+        f"Raw transaction was signed, tx_hash={tx_hash}",
         extra={
             "wallet": wallet["external_id"],
-            "tx_hash": signed_tx.hash.hex(),
+            "tx_hash": tx_hash,
         },
     )
     db_raw_tx = (
@@ -267,16 +298,16 @@ async def create_raw_transaction(
         .values(
             {
                 "status": RawTransactionStatus.CREATED,
-                "tx_hash": signed_tx.hash.hex(),
+                "tx_hash": tx_hash,
                 "tx_from": wallet["address"],
-                "tx_to": transaction_to,
-                "tx_value": value,
+                "tx_to": raw_transaction["to"],
+                "tx_value": raw_transaction["value"],
                 "gas_limit": raw_transaction["gas"],
                 "gas_price": raw_transaction["maxFeePerGas"],
-                "nonce": nonce,
-                "max_fee_per_gas": max_fee_per_gas,
-                "max_priority_fee_per_gas": max_priority_fee_per_gas,
-                "raw": signed_tx.rawTransaction.hex(),
+                "nonce": raw_transaction["nonce"],
+                "max_fee_per_gas": raw_transaction["maxFeePerGas"],
+                "max_priority_fee_per_gas": raw_transaction["maxPriorityFeePerGas"],
+                "raw": signed_raw,
             }
         )
         .returning(RawTransaction)
@@ -284,79 +315,184 @@ async def create_raw_transaction(
 
     logger.debug(
         "Raw transaction was inserted into DB",
-        extra={"wallet": wallet["external_id"], "tx_hash": signed_tx.hash.hex()},
+        extra={"wallet": wallet["external_id"], "tx_hash": tx_hash},
     )
 
     return await fetch_one(db_raw_tx)
 
 
-async def insert_raw_transaction_from_blockchain(blockchain_tx_data: TxData):
-    # Get transaction receipt
-    tx_receipt = await w3_obj.eth.get_transaction_receipt(blockchain_tx_data["hash"])
-    db_raw_tx = (
-        insert(RawTransaction)
-        .values(
-            {
-                "status": RawTransactionStatus.PENDING,
-                "tx_hash": blockchain_tx_data["hash"].hex(),
-                "tx_from": blockchain_tx_data["from"],
-                "tx_to": blockchain_tx_data["to"],
-                "tx_value": blockchain_tx_data["value"],
-                "tx_fee": tx_receipt["gasUsed"] * tx_receipt["effectiveGasPrice"],
-                "tx_input": blockchain_tx_data["input"].hex(),
-                "gas_price": blockchain_tx_data["gasPrice"],
-                "gas_limit": blockchain_tx_data["gas"],
-                "gas_used": tx_receipt["gasUsed"],
-                "nonce": blockchain_tx_data["nonce"],
-                "block_number": blockchain_tx_data["blockNumber"],
-                "confirmation_count": 1,
-                # "base_fee_per_gas": tx_receipt["baseFeePerGas"],
-                "max_fee_per_gas": blockchain_tx_data["maxFeePerGas"],
-                "max_priority_fee_per_gas": blockchain_tx_data["maxPriorityFeePerGas"],
-            }
+# Statuses of our own transactions before they are seen in a block. FAILED ones may still
+# be mined when the node accepted them but the broadcast call failed.
+UNMINED_RAW_TX_STATUSES = [
+    RawTransactionStatus.CREATED,
+    RawTransactionStatus.BROADCASTED,
+    RawTransactionStatus.FAILED,
+    RawTransactionStatus.DROPPED_AND_REPLACED,
+]
+# Columns known only once the transaction is mined.
+MINED_RAW_TX_COLUMNS = [
+    "status",
+    "tx_fee",
+    "tx_input",
+    "gas_price",
+    "gas_used",
+    "block_number",
+    "confirmation_count",
+]
+
+
+def _raw_transaction_from_blockchain(blockchain_tx_data: TxData, tx_receipt: TxReceipt) -> dict:
+    return {
+        "status": RawTransactionStatus.PENDING,
+        "tx_hash": blockchain_tx_data["hash"].hex(),
+        "tx_from": blockchain_tx_data["from"],
+        "tx_to": blockchain_tx_data["to"],
+        "tx_value": blockchain_tx_data["value"],
+        "tx_fee": tx_receipt["gasUsed"] * tx_receipt["effectiveGasPrice"],
+        "tx_input": blockchain_tx_data["input"].hex(),
+        "gas_price": blockchain_tx_data["gasPrice"],
+        "gas_limit": blockchain_tx_data["gas"],
+        "gas_used": tx_receipt["gasUsed"],
+        "nonce": blockchain_tx_data["nonce"],
+        "block_number": blockchain_tx_data["blockNumber"],
+        "confirmation_count": 1,
+        # "base_fee_per_gas": tx_receipt["baseFeePerGas"],
+        "max_fee_per_gas": blockchain_tx_data["maxFeePerGas"],
+        "max_priority_fee_per_gas": blockchain_tx_data["maxPriorityFeePerGas"],
+    }
+
+
+async def upsert_raw_transactions_from_blockchain(
+    transactions: list[tuple[TxData, TxReceipt]],
+) -> dict[str, dict]:
+    """
+    Store mined transactions with one multi-row INSERT ... ON CONFLICT (tx_hash) per chunk.
+
+    Our own transactions already stored before they were mined become PENDING with their
+    on-chain data, transactions already seen in a block are left untouched, so scanning
+    the same block again changes nothing. Returns raw transactions by hash.
+    """
+    table = RawTransaction.__table__
+    raw_transactions = {}
+
+    for offset in range(0, len(transactions), RAW_TX_INSERT_CHUNK_SIZE):
+        query = pg_insert(table).values(
+            [
+                _raw_transaction_from_blockchain(blockchain_tx_data, tx_receipt)
+                for blockchain_tx_data, tx_receipt in transactions[
+                    offset : offset + RAW_TX_INSERT_CHUNK_SIZE
+                ]
+            ]
         )
-        .returning(RawTransaction)
+        is_unmined = table.c.status.in_(UNMINED_RAW_TX_STATUSES)
+        query = query.on_conflict_do_update(
+            index_elements=[table.c.tx_hash],
+            set_={
+                **{
+                    column: case((is_unmined, query.excluded[column]), else_=table.c[column])
+                    for column in MINED_RAW_TX_COLUMNS
+                },
+                "updated_at": datetime.utcnow(),
+            },
+        ).returning(*table.c)
+
+        for raw_transaction in await fetch_rows(query):
+            raw_transactions[raw_transaction["tx_hash"]] = raw_transaction
+
+    logger.debug(f"Stored {len(raw_transactions)} raw transactions from blockchain")
+    return raw_transactions
+
+
+async def drop_replaced_raw_transactions(mined_transactions: list[dict]) -> list[dict]:
+    """
+    Mark BROADCASTED transactions sharing (tx_from, nonce) with one of `mined_transactions`
+    as DROPPED_AND_REPLACED by it, with one statement. Once a nonce is mined every other
+    transaction signed with it, original or replacement, can never be. Returns dropped ones.
+    """
+    if not mined_transactions:
+        return []
+
+    mined = values(
+        column("tx_from", AddressBinary),
+        column("nonce", Integer),
+        column("tx_hash", HexBinary),
+        name="mined",
+    ).data(
+        [
+            (raw_transaction["tx_from"], raw_transaction["nonce"], raw_transaction["tx_hash"])
+            for raw_transaction in mined_transactions
+        ]
     )
-    result = await fetch_one(db_raw_tx)
 
-    logger.debug(
-        f"Raw transaction {blockchain_tx_data['hash'].hex()} was inserted into DB",
-        extra={"tx_hash": blockchain_tx_data["hash"].hex()},
+    dropped_transactions = await transition_raw_transactions(
+        RawTransactionStatus.DROPPED_AND_REPLACED,
+        RawTransaction.status == RawTransactionStatus.BROADCASTED,
+        RawTransaction.tx_from == mined.c.tx_from,
+        RawTransaction.nonce == mined.c.nonce,
+        RawTransaction.tx_hash != mined.c.tx_hash,
+        replaced_by=mined.c.tx_hash,
     )
 
-    return result
+    for raw_transaction in dropped_transactions:
+        logger.info(
+            f"Raw transaction {raw_transaction['tx_hash']} was dropped, nonce"
+            f" {raw_transaction['nonce']} was mined by {raw_transaction['replaced_by']}",
+            extra={"tx_hash": raw_transaction["tx_hash"]},
+        )
 
+    return dropped_transactions
 
-async def create_system_transaction(
-    raw_transaction: RawTransaction,
-    wallet: dict,
-) -> dict:
-    amount = Web3.from_wei(raw_transaction["tx_value"], "ether")
 
-    if raw_transaction["tx_to"] == wallet["address"]:
-        direction = TransactionDirection.IN
-    elif raw_transaction["tx_from"] == wallet["address"]:
-        direction = TransactionDirection.OUT
-    else:
-        raise Exception("Invalid transaction direction")
+async def create_system_transactions(
+    transactions: list[tuple[dict, dict, TransactionDirection]]
+) -> list[dict]:
+    """
+    Create system transactions for (raw transaction, wallet, direction) with one multi-row
+    INSERT ... ON CONFLICT DO NOTHING and credit wallet balances with the created ones.
+    Pairs that already have a system transaction are skipped, returns only created ones.
+    """
+    if not transactions:
+        return []
 
-    status = RAW_SYSTEM_TX_STATUS_MAPPING[raw_transaction["status"]]
+    table = SystemTransaction.__table__
+    fees = {
+        raw_transaction["id"]: raw_transaction["tx_fee"] for raw_transaction, _, _ in transactions
+    }
 
-    system_transaction = (
-        insert(SystemTransaction)
+    query = (
+        pg_insert(table)
         .values(
-            {
-                "origin_id": raw_transaction["id"],
-                "wallet_id": wallet["id"],
-                "amount": str(amount),
-                "status": status,
-                "direction": direction,
-            }
+            [
+                {
+                    "origin_id": raw_transaction["id"],
+                    "wallet_id": wallet["id"],
+                    "amount": str(Web3.from_wei(raw_transaction["tx_value"], "ether")),
+                    "status": RAW_SYSTEM_TX_STATUS_MAPPING[raw_transaction["status"]],
+                    "direction": direction,
+                }
+                for raw_transaction, wallet, direction in transactions
+            ]
+        )
+        .on_conflict_do_nothing(
+            index_elements=[table.c.origin_id, table.c.wallet_id, table.c.direction]
         )
-        .returning(SystemTransaction)
+        .returning(*table.c)
     )
 
-    return await fetch_one(system_transaction)
+    async with unit_of_work():
+        system_transactions = await fetch_rows(query)
+        await apply_balance_changes(
+            [
+                {
+                    **system_transaction,
+                    "previous_status": None,
+                    "tx_fee": fees[system_transaction["origin_id"]],
+                }
+                for system_transaction in system_transactions
+            ]
+        )
+
+    return system_transactions
 
 
 async def broadcast_transaction(raw_transaction: dict) -> dict:
@@ -369,20 +505,251 @@ async def broadcast_transaction(raw_transaction: dict) -> dict:
             raise ReplacementTransactionUnderpriced(
                 external_id=raw_transaction["external_id"]
             ) from exc
+        raise
 
-    query = (
-        update(RawTransaction)
-        .where(RawTransaction.id == raw_transaction["id"])
-        .values(
-            {
-                "status": RawTransactionStatus.BROADCASTED,
-            }
-        )
-        .returning(RawTransaction)
-    )
-    result = await fetch_one(query)
+    result = await update_raw_transaction_status(raw_transaction, RawTransactionStatus.BROADCASTED)
     logger.debug(
         f"Raw transaction {raw_transaction['tx_hash']} was broadcasted",
         extra={"tx_hash": raw_transaction["tx_hash"]},
     )
     return result
+
+
+async def get_stuck_raw_transactions(broadcasted_before: datetime) -> list[dict]:
+    query = (
+        select(RawTransaction)
+        .where(
+            RawTransaction.status == RawTransactionStatus.BROADCASTED,
+            RawTransaction.updated_at < broadcasted_before,
+        )
+        .order_by(RawTransaction.tx_from, RawTransaction.nonce)
+    )
+    # Replaced transactions must not be picked up again from a lagging replica.
+    return await fetch_all(query, use_primary=True)
+
+
+def _bump_fee(fee: int) -> int:
+    # Nodes only accept a replacement paying at least REPLACEMENT_FEE_BUMP_PERCENT more.
+    return -(-fee * (100 + settings.REPLACEMENT_FEE_BUMP_PERCENT) // 100)
+
+
+async def resolve_spent_nonce(raw_transaction: dict) -> None:
+    """
+    Nonce of a BROADCASTED transaction was spent. If the transaction itself was mined, the
+    scanner moves it to PENDING, otherwise another one took its nonce and it can never be
+    mined, so it is marked DROPPED_AND_REPLACED and not picked up again.
+    """
+    receipt = await rpc_request("eth_getTransactionReceipt", [raw_transaction["tx_hash"]])
+
+    if receipt is not None:
+        return
+
+    await update_raw_transaction_status(raw_transaction, RawTransactionStatus.DROPPED_AND_REPLACED)
+    logger.info(
+        f"Raw transaction {raw_transaction['tx_hash']} was not mined, its nonce"
+        f" {raw_transaction['nonce']} is spent by another transaction",
+        extra={"tx_hash": raw_transaction["tx_hash"]},
+    )
+
+
+async def replace_raw_transaction(
+    raw_transaction: dict,
+    wallet: dict,
+    gas_policy: GasPolicy = GasPolicy.FAST,
+) -> dict | None:
+    """
+    Re-sign a stuck transaction at the same nonce with bumped fees and broadcast it. The
+    original is marked DROPPED_AND_REPLACED and linked to the replacement via `replaced_by`.
+    Returns the replacement, or None if the original can not or need not be replaced.
+    """
+    max_fee_per_gas, max_priority_fee_per_gas = await get_fees_by_policy(gas_policy)
+    max_priority_fee_per_gas = max(
+        max_priority_fee_per_gas, _bump_fee(raw_transaction["max_priority_fee_per_gas"])
+    )
+    max_fee_per_gas = max(
+        max_fee_per_gas, _bump_fee(raw_transaction["max_fee_per_gas"]), max_priority_fee_per_gas
+    )
+
+    if max_fee_per_gas > settings.REPLACEMENT_MAX_FEE_PER_GAS:
+        logger.warning(
+            f"Replacement of {raw_transaction['tx_hash']} would pay {max_fee_per_gas} wei/gas,"
+            f" above the {settings.REPLACEMENT_MAX_FEE_PER_GAS} cap",
+            extra={"tx_hash": raw_transaction["tx_hash"]},
+        )
+        return None
+
+    replacement = {
+        "to": Web3.to_checksum_address(raw_transaction["tx_to"]),
+        "from": Web3.to_checksum_address(raw_transaction["tx_from"]),
+        "value": raw_transaction["tx_value"],
+        "gas": raw_transaction["gas_limit"],
+        "maxFeePerGas": max_fee_per_gas,
+        "maxPriorityFeePerGas": max_priority_fee_per_gas,
+        "chainId": settings.CHAIN_ID,
+        "nonce": raw_transaction["nonce"],
+    }
+
+    replacement_transaction = await sign_and_store_raw_transaction(
+        wallet=wallet, raw_transaction=replacement
+    )
+
+    try:
+        replacement_transaction = await broadcast_transaction(replacement_transaction)
+    except NonceIsTooLow:
+        await set_raw_transaction_to_failed(replacement_transaction)
+        await resolve_spent_nonce(raw_transaction)
+        return None
+    except ReplacementTransactionUnderpriced:
+        # Mempool holds a better paying transaction for this nonce, retry on the next round.
+        await set_raw_transaction_to_failed(replacement_transaction)
+        return None
+    except Exception:
+        await set_raw_transaction_to_failed(replacement_transaction)
+        raise
+
+    await update_raw_transaction_status(
+        raw_transaction,
+        status=RawTransactionStatus.DROPPED_AND_REPLACED,
+        replaced_by=replacement_transaction["tx_hash"],
+    )
+
+    logger.info(
+        f"Raw transaction {raw_transaction['tx_hash']} replaced by"
+        f" {replacement_transaction['tx_hash']} (max fee {max_fee_per_gas},"
+        f" priority fee {max_priority_fee_per_gas})",
+        extra={"tx_hash": raw_transaction["tx_hash"]},
+    )
+    return replacement_transaction
+
+
+async def accelerate_stuck_transactions() -> int:
+    """Replace every transaction broadcasted more than ACCELERATOR_STUCK_BLOCKS ago."""
+    broadcasted_before = datetime.utcnow() - timedelta(
+        seconds=settings.ACCELERATOR_STUCK_BLOCKS * settings.BLOCK_TIME
+    )
+    replaced = 0
+
+    for raw_transaction in await get_stuck_raw_transactions(broadcasted_before):
+        wallet = await fetch_one(select(Wallet).where(Wallet.address == raw_transaction["tx_from"]))
+
+        if wallet is None:
+            continue
+
+        try:
+            if await replace_raw_transaction(raw_transaction, wallet=wallet):
+                replaced += 1
+        except Exception as exc:
+            logger.exception(
+                f"Failed to replace raw transaction {raw_transaction['tx_hash']}: {exc}",
+                extra={"tx_hash": raw_transaction["tx_hash"]},
+            )
+
+    return replaced
+
+
+# Raw transactions that will not change anymore, see `archive_finalized_transactions`.
+FINALIZED_RAW_TX_STATUSES = [
+    RawTransactionStatus.CONFIRMED,
+    RawTransactionStatus.FAILED,
+    RawTransactionStatus.DROPPED_AND_REPLACED,
+]
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return (value.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+async def ensure_archive_partitions(since: datetime, until: datetime) -> None:
+    """Create monthly partitions of the archive tables covering `since` to `until`."""
+    month = _month_start(since)
+
+    while month <= until:
+        for table in (raw_transaction_archive, system_transaction_archive):
+            await execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {table.name}_{month:%Y_%m}"
+                    f" PARTITION OF {table.name}"
+                    f" FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_next_month(month):%Y-%m-%d}')"
+                )
+            )
+        month = _next_month(month)
+
+
+def _copy_into(archive: Table, rows: CTE) -> Insert:
+    return insert(archive).from_select([column.name for column in rows.c], select(*rows.c))
+
+
+def _archive_batch_query(horizon: datetime, batch_size: int) -> Insert:
+    raw_table = RawTransaction.__table__
+    system_table = SystemTransaction.__table__
+
+    batch = (
+        select(raw_table.c.id)
+        .where(
+            raw_table.c.status.in_(FINALIZED_RAW_TX_STATUSES),
+            raw_table.c.updated_at < horizon,
+        )
+        .order_by(raw_table.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    # Rows are deleted and copied by one statement, nothing is lost or archived twice.
+    moved_raw = (
+        delete(raw_table).where(raw_table.c.id.in_(batch)).returning(*raw_table.c).cte("moved_raw")
+    )
+    moved_system = (
+        delete(system_table)
+        .where(system_table.c.origin_id == moved_raw.c.id)
+        .returning(*system_table.c)
+        .cte("moved_system")
+    )
+    archived_system = (
+        _copy_into(system_transaction_archive, moved_system)
+        .returning(system_transaction_archive.c.id)
+        .cte("archived_system")
+    )
+    return (
+        _copy_into(raw_transaction_archive, moved_raw)
+        .returning(raw_transaction_archive.c.id)
+        .add_cte(archived_system)
+    )
+
+
+async def archive_finalized_transactions(
+    batch_size: int = settings.ARCHIVE_BATCH_SIZE,
+) -> int:
+    """
+    Move raw transactions finalized more than ARCHIVE_RETENTION_DAYS ago, with their system
+    transactions, into the monthly partitioned archive tables. Keeps the tables the scanner
+    works on bounded. Wallet balances are not touched, the ledger already counts them.
+    Returns the number of archived raw transactions.
+    """
+    horizon = datetime.utcnow() - timedelta(days=settings.ARCHIVE_RETENTION_DAYS)
+
+    oldest = await fetch_scalar(
+        select(func.min(RawTransaction.created_at)).where(
+            RawTransaction.status.in_(FINALIZED_RAW_TX_STATUSES),
+            RawTransaction.updated_at < horizon,
+        )
+    )
+    if oldest is None:
+        return 0
+
+    # System transactions are created after their raw transaction, up to now.
+    await ensure_archive_partitions(oldest, datetime.utcnow())
+
+    archived = 0
+    while True:
+        async with unit_of_work():
+            batch = await fetch_rows(_archive_batch_query(horizon, batch_size))
+
+        archived += len(batch)
+        if len(batch) < batch_size:
+            break
+
+    logger.info(f"Archived {archived} raw transactions finalized before {horizon}")
+    return archived
@@ -0,0 +1,25 @@
+import asyncio
+
+from src.celery.config import BROADCAST_QUEUE, WALLETS_QUEUE, app
+from src.modules.transactions.service import (
+    accelerate_stuck_transactions,
+    archive_finalized_transactions,
+)
+
+
+@app.task(
+    name="accelerate_stuck_transactions",
+    queue=BROADCAST_QUEUE,
+    ignore_result=True,
+)
+def accelerate_stuck_transactions_task():
+    asyncio.run(accelerate_stuck_transactions())
+
+
+@app.task(
+    name="archive_finalized_transactions",
+    queue=WALLETS_QUEUE,
+    ignore_result=True,
+)
+def archive_finalized_transactions_task():
+    asyncio.run(archive_finalized_transactions())
@@ -1,11 +1,177 @@
+import logging
+
+from eth_utils import to_int
+from hexbytes import HexBytes
 from web3 import AsyncWeb3
+from web3.datastructures import AttributeDict
+from web3.types import RPCEndpoint, TxReceipt
+
+from src.core.config import settings
+from src.core.executors import get_executor, run_in_executor
+from src.core.rpc import batch_request
+from src.modules.transactions.enums import GasPolicy
+from src.modules.wallets.utils import get_account_by_index
+
+logger = logging.getLogger("root")
+
+# Unset until the first eth_getBlockReceipts call tells us whether the node supports it.
+_block_receipts_supported: bool | None = None
+
+# Reward percentile of recent blocks paid as priority fee by each gas policy.
+PRIORITY_FEE_PERCENTILES = {
+    GasPolicy.STANDARD: 10,
+    GasPolicy.FAST: 50,
+    GasPolicy.FASTEST: 90,
+}
+# Blocks of maximal base fee growth the max fee of each gas policy still covers.
+BASE_FEE_HEADROOM_BLOCKS = {
+    GasPolicy.STANDARD: 2,
+    GasPolicy.FAST: 4,
+    GasPolicy.FASTEST: 6,
+}
+
+RECEIPT_INT_FIELDS = (
+    "blockNumber",
+    "cumulativeGasUsed",
+    "effectiveGasPrice",
+    "gasUsed",
+    "status",
+    "transactionIndex",
+    "type",
+)
+RECEIPT_BYTES_FIELDS = ("blockHash", "transactionHash")
+
+
+def _median(values: list[int]) -> int:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) // 2
+
+
+async def estimate_fees(w3: AsyncWeb3, blocks: int) -> dict[GasPolicy, tuple[int, int]]:
+    """
+    Estimate (max_fee_per_gas, max_priority_fee_per_gas) for every gas policy.
+
+    Priority fee is the median, over the last `blocks` blocks, of the reward percentile the
+    policy maps to. Max fee is the next block base fee, which the node derives from the
+    parent block per EIP-1559 and returns as the last `baseFeePerGas` item, grown by the
+    policy's headroom of max +12.5% per block, plus the priority fee.
+    """
+    percentiles = list(PRIORITY_FEE_PERCENTILES.values())
+    result = await w3.eth.fee_history(blocks, "latest", percentiles)
+    next_base_fee = result["baseFeePerGas"][-1]
+
+    # Empty blocks report zero rewards and would drag the estimate down.
+    rewards = [
+        block_rewards
+        for block_rewards, gas_used_ratio in zip(
+            result["reward"], result["gasUsedRatio"], strict=True
+        )
+        if gas_used_ratio > 0
+    ] or result["reward"]
+
+    fees = {}
+    for position, gas_policy in enumerate(PRIORITY_FEE_PERCENTILES):
+        priority_fee = max(
+            _median([block_rewards[position] for block_rewards in rewards]),
+            settings.GAS_MIN_PRIORITY_FEE,
+        )
+        max_base_fee = int(next_base_fee * 1.125 ** BASE_FEE_HEADROOM_BLOCKS[gas_policy])
+        fees[gas_policy] = (max_base_fee + priority_fee, priority_fee)
+
+    return fees
+
+
+def format_receipt(receipt: dict) -> TxReceipt:
+    """Convert a raw JSON-RPC receipt into the same shape `get_transaction_receipt` returns."""
+    formatted = dict(receipt)
+
+    for field in RECEIPT_INT_FIELDS:
+        if formatted.get(field) is not None:
+            formatted[field] = to_int(hexstr=formatted[field])
+
+    for field in RECEIPT_BYTES_FIELDS:
+        if formatted.get(field) is not None:
+            formatted[field] = HexBytes(formatted[field])
+
+    return AttributeDict(formatted)
+
+
+async def get_block_receipts(
+    w3: AsyncWeb3,
+    block_number: int,
+    tx_hashes: list[str],
+) -> dict[str, TxReceipt]:
+    """
+    Fetch receipts of `tx_hashes` mined in `block_number`, mapped by transaction hash.
+
+    Uses a single eth_getBlockReceipts call when the node supports it and falls back to
+    per-transaction eth_getTransactionReceipt calls sent as a JSON-RPC batch otherwise.
+    """
+    global _block_receipts_supported
+
+    if not tx_hashes:
+        return {}
+
+    if _block_receipts_supported is not False:
+        response = await w3.provider.make_request(
+            RPCEndpoint("eth_getBlockReceipts"), [hex(block_number)]
+        )
+
+        if "error" not in response:
+            _block_receipts_supported = True
+            receipts = {
+                receipt["transactionHash"].hex(): receipt
+                for receipt in map(format_receipt, response["result"] or [])
+            }
+            wanted = set(tx_hashes)
+            if wanted.issubset(receipts):
+                return {tx_hash: receipts[tx_hash] for tx_hash in tx_hashes}
+
+            logger.warning(
+                f"eth_getBlockReceipts for block {block_number} is missing receipts,"
+                f" falling back to per-transaction calls",
+                extra={"block_number": block_number},
+            )
+        elif _block_receipts_supported is None:
+            _block_receipts_supported = False
+            logger.warning(
+                f"Node does not support eth_getBlockReceipts ({response['error']}),"
+                f" falling back to per-transaction receipts"
+            )
+        else:
+            raise ValueError(response["error"])
+
+    receipts = await batch_request(
+        [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+    )
+    return {
+        tx_hash: format_receipt(receipt)
+        for tx_hash, receipt in zip(tx_hashes, receipts, strict=True)
+    }
+
+
+def sign_transaction_by_index(index: int, transaction: dict) -> tuple[str, str]:
+    """
+    Sign `transaction` with the key of wallet `index`, returns (tx_hash, raw) as hex strings.
+
+    Runs inside the signing pool. The key is derived there from settings, only the wallet
+    index and the transaction cross the executor boundary.
+    """
+    account = get_account_by_index(
+        xprivate_key=settings.ETH_WALLET_XPRIV.get_secret_value(), index=index
+    )
+    signed_tx = account.sign_transaction(transaction)
+    return signed_tx.hash.hex(), signed_tx.rawTransaction.hex()
 
 
-async def get_gas_from_history(w3: AsyncWeb3) -> tuple[int, int, int]:
-    result = await w3.eth.fee_history(10, "latest", [10, 95])
-    base_fee_per_gas_list = result["baseFeePerGas"]
-    return (
-        min(base_fee_per_gas_list),
-        int(sum(base_fee_per_gas_list) / len(base_fee_per_gas_list)),
-        max(base_fee_per_gas_list),
+async def sign_transaction(index: int, transaction: dict) -> tuple[str, str]:
+    executor = get_executor(
+        "transaction_signing",
+        kind=settings.SIGNING_EXECUTOR,
+        max_workers=settings.SIGNING_WORKERS,
     )
+    return await run_in_executor(executor, sign_transaction_by_index, index, dict(transaction))
@@ -5,3 +5,10 @@ class WalletStatus(str, Enum):
     ACTIVE = "ACTIVE"
     INACTIVE = "INACTIVE"
     DELETED = "DELETED"
+
+
+class WithdrawalStatus(str, Enum):
+    ACCEPTED = "ACCEPTED"
+    PROCESSING = "PROCESSING"
+    BROADCASTED = "BROADCASTED"
+    FAILED = "FAILED"
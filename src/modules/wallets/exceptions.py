@@ -30,3 +30,12 @@ class WalletWithIndexAlreadyExists(WalletException):
     def __init__(self, index: int | None = None):
         self.error_description = f"Wallet with {index=} is already exists"
         super().__init__(error_description=self.error_description)
+
+
+class WithdrawalNotFound(WalletException):
+    status_code = 404
+    error_name = "WITHDRAWAL_NOT_FOUND"
+
+    def __init__(self, withdrawal_id: str | None = None):
+        self.error_description = f"Withdrawal with {withdrawal_id=} not found"
+        super().__init__(error_description=self.error_description)
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import Integer, Numeric, column, update, values
+from web3 import Web3
+
+from src.database.utils import execute
+from src.modules.transactions.enums import TransactionDirection, TransactionStatus
+from src.modules.wallets.models import Wallet
+
+# Which balance of the wallet a system transaction counts towards while in the status.
+BALANCE_BY_STATUS = {
+    TransactionStatus.PENDING: "pending_balance",
+    TransactionStatus.CONFIRMED: "confirmed_balance",
+}
+
+
+def _get_balance(status: str | None) -> str | None:
+    return BALANCE_BY_STATUS.get(TransactionStatus(status)) if status else None
+
+
+def get_balance_delta(change: dict) -> int:
+    """Signed wei amount a system transaction adds to its wallet, outgoing ones pay the fee."""
+    amount = int(Web3.to_wei(Decimal(change["amount"]), "ether"))
+
+    if change["direction"] == TransactionDirection.IN:
+        return amount
+    return -(amount + (change.get("tx_fee") or 0))
+
+
+async def apply_balance_changes(changes: list[dict]) -> None:
+    """
+    Move wallet balances after system transactions changed status. Every change carries
+    `wallet_id`, `amount`, `direction`, `tx_fee` of the raw transaction, `previous_status`
+    (None for new system transactions) and `status`.
+
+    Must run in the same database transaction as the status change, all wallets are
+    updated by one UPDATE ... FROM (VALUES ...) statement.
+    """
+    deltas: dict[int, dict[str, int]] = defaultdict(
+        lambda: {"confirmed_balance": 0, "pending_balance": 0}
+    )
+
+    for change in changes:
+        previous_balance = _get_balance(change["previous_status"])
+        balance = _get_balance(change["status"])
+
+        if previous_balance == balance:
+            continue
+
+        delta = get_balance_delta(change)
+        if previous_balance:
+            deltas[change["wallet_id"]][previous_balance] -= delta
+        if balance:
+            deltas[change["wallet_id"]][balance] += delta
+
+    if not deltas:
+        return
+
+    balance_deltas = values(
+        column("wallet_id", Integer),
+        column("confirmed_balance", Numeric(78, 0)),
+        column("pending_balance", Numeric(78, 0)),
+        name="balance_delta",
+    ).data(
+        [
+            (wallet_id, delta["confirmed_balance"], delta["pending_balance"])
+            for wallet_id, delta in deltas.items()
+        ]
+    )
+
+    query = (
+        update(Wallet)
+        .where(Wallet.id == balance_deltas.c.wallet_id)
+        .values(
+            confirmed_balance=Wallet.confirmed_balance + balance_deltas.c.confirmed_balance,
+            pending_balance=Wallet.pending_balance + balance_deltas.c.pending_balance,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await execute(query)
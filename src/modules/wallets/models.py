@@ -1,12 +1,25 @@
-from sqlalchemy import Integer, String
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database.base import BaseModel
+from src.database.types import Wei
 from src.modules.wallets.enums import WalletStatus
 
 
 class Wallet(BaseModel):
     __tablename__ = "wallet"
+    __table_args__ = (
+        # Pre-derived wallets waiting in the pool to be handed out.
+        Index(
+            "ix_wallet_pool",
+            "index",
+            postgresql_where=text("status = 'INACTIVE' AND issued_at IS NULL"),
+        ),
+        # Active wallets, swept into the main wallet and listed by status.
+        Index("ix_wallet_active", "index", postgresql_where=text("status = 'ACTIVE'")),
+    )
 
     address: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
     status: Mapped[WalletStatus] = mapped_column(
@@ -14,3 +27,11 @@ class Wallet(BaseModel):
     )
     nonce: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     index: Mapped[int | None] = mapped_column(Integer, nullable=True, unique=True)
+    # Null while the wallet sits in the pre-derived pool.
+    issued_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    # Wei, maintained by the ledger together with system transaction statuses.
+    confirmed_balance: Mapped[int] = mapped_column(
+        Wei, nullable=False, default=0, server_default="0"
+    )
+    pending_balance: Mapped[int] = mapped_column(Wei, nullable=False, default=0, server_default="0")
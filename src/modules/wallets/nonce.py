@@ -0,0 +1,147 @@
+import logging
+
+from eth_utils import to_int
+from sqlalchemy import func, update
+
+from src.core.rpc import rpc_request
+from src.database.redis import redis
+from src.database.utils import execute
+from src.modules.wallets.models import Wallet
+
+logger = logging.getLogger("root")
+
+# Hand out the lowest released nonce first (a gap blocks every later nonce of the wallet),
+# otherwise the next one from the counter. Returns nil when the counter is not synced yet.
+ALLOCATE_NONCE_SCRIPT = redis.register_script(
+    """
+    local nonce
+    local gap = redis.call('ZRANGE', KEYS[2], 0, 0)[1]
+
+    if gap then
+        redis.call('ZREM', KEYS[2], gap)
+        nonce = tonumber(gap)
+    else
+        local next_nonce = redis.call('GET', KEYS[1])
+        if not next_nonce then
+            return false
+        end
+        nonce = tonumber(next_nonce)
+        redis.call('SET', KEYS[1], nonce + 1)
+    end
+
+    redis.call('ZADD', KEYS[3], nonce, nonce)
+    return nonce
+    """
+)
+
+# Put a nonce that was never broadcast back, so the next allocation reuses it.
+RELEASE_NONCE_SCRIPT = redis.register_script(
+    """
+    if redis.call('ZREM', KEYS[2], ARGV[1]) == 1 then
+        redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1])
+    end
+    return 1
+    """
+)
+
+# Align the counter with the node's pending transaction count. Everything below it is
+# used on chain, nonces between it and our counter that are not in flight were lost
+# (failed or dropped broadcasts) and become gaps to fill.
+RESYNC_NONCE_SCRIPT = redis.register_script(
+    """
+    local pending = tonumber(ARGV[1])
+    local max_gap = tonumber(ARGV[2])
+
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. pending)
+    redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', '(' .. pending)
+
+    local next_nonce = tonumber(redis.call('GET', KEYS[1]) or pending)
+    if next_nonce < pending or next_nonce - pending > max_gap then
+        next_nonce = pending
+        redis.call('DEL', KEYS[2])
+    end
+
+    for nonce = pending, next_nonce - 1 do
+        if not redis.call('ZSCORE', KEYS[3], nonce) then
+            redis.call('ZADD', KEYS[2], nonce, nonce)
+        end
+    end
+
+    redis.call('SET', KEYS[1], next_nonce)
+    return next_nonce
+    """
+)
+
+# Counter drifting further than this from the node is treated as corrupted and reset.
+MAX_NONCE_GAP = 1_000
+
+
+def _nonce_keys(wallet: dict) -> tuple[str, str, str]:
+    prefix = f"EWS:{wallet['external_id']}:nonce"
+    return prefix, f"{prefix}:gaps", f"{prefix}:inflight"
+
+
+async def get_pending_nonce(wallet: dict) -> int:
+    # Goes through the shared batcher, concurrent resyncs end up in one JSON-RPC batch.
+    return to_int(
+        hexstr=await rpc_request("eth_getTransactionCount", [wallet["address"], "pending"])
+    )
+
+
+async def resync_nonce(wallet: dict) -> int:
+    """Resync the nonce counter of the wallet with the node, returns the next free nonce."""
+    pending_nonce = await get_pending_nonce(wallet)
+    next_nonce = await RESYNC_NONCE_SCRIPT(
+        keys=list(_nonce_keys(wallet)), args=[pending_nonce, MAX_NONCE_GAP]
+    )
+
+    logger.info(
+        f"Nonce of wallet {wallet['address']} resynced: pending={pending_nonce},"
+        f" next={next_nonce}",
+        extra={"wallet": wallet["external_id"]},
+    )
+    return int(next_nonce)
+
+
+async def get_next_nonces(wallets: list[dict]) -> list[int | None]:
+    """Next nonce from the counter of every wallet, None for wallets never synced."""
+    if not wallets:
+        return []
+
+    nonces = await redis.mget([_nonce_keys(wallet)[0] for wallet in wallets])
+    return [int(nonce) if nonce is not None else None for nonce in nonces]
+
+
+async def allocate_nonce(wallet: dict) -> int:
+    """
+    Atomically reserve a nonce for an outgoing transaction of the wallet. The nonce stays
+    in flight until it is either committed (broadcast went through) or released.
+    """
+    keys = list(_nonce_keys(wallet))
+    nonce = await ALLOCATE_NONCE_SCRIPT(keys=keys)
+
+    if nonce is None:
+        await resync_nonce(wallet)
+        nonce = await ALLOCATE_NONCE_SCRIPT(keys=keys)
+
+    return int(nonce)
+
+
+async def release_nonce(wallet: dict, nonce: int) -> None:
+    """Give back a nonce whose transaction never reached the node."""
+    _, gaps_key, inflight_key = _nonce_keys(wallet)
+    await RELEASE_NONCE_SCRIPT(keys=[gaps_key, inflight_key], args=[nonce])
+
+
+async def commit_nonce(wallet: dict, nonce: int) -> None:
+    """Mark a nonce as used by a transaction accepted by the node."""
+    _, _, inflight_key = _nonce_keys(wallet)
+    await redis.zrem(inflight_key, nonce)
+
+    query = (
+        update(Wallet)
+        .where(Wallet.id == wallet["id"])
+        .values(nonce=func.greatest(Wallet.nonce, nonce + 1))
+        .execution_options(synchronize_session=False)
+    )
+    await execute(query)
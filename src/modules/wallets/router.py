@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
-from src.modules.wallets.dependencies import get_wallet
-from src.modules.wallets.exceptions import WalletWithIndexAlreadyExists
-from src.modules.wallets.schemas import WalletSchema
-from src.modules.wallets.service import create_wallet, get_wallet_by_index, get_wallets_list
+from src.core.config import settings
+from src.modules.wallets.dependencies import active_wallet, get_wallet
+from src.modules.wallets.exceptions import WalletWithIndexAlreadyExists, WithdrawalNotFound
+from src.modules.wallets.schemas import WalletSchema, WithdrawalRequestSchema, WithdrawalSchema
+from src.modules.wallets.service import (
+    create_wallet,
+    create_wallets_batch,
+    enqueue_withdrawal,
+    get_wallet_by_index,
+    get_wallets_list,
+    get_withdrawal,
+    issue_deposit_wallet,
+)
 
 router = APIRouter(prefix="/wallet", tags=["wallets"])
 
@@ -34,6 +44,20 @@ async def get_wallets_list_view() -> list[dict]:
     return await get_wallets_list()
 
 
+@router.get(
+    path="/withdrawal/{withdrawal_id}",
+    response_model=WithdrawalSchema,
+    summary="Get queued withdrawal",
+)
+async def get_withdrawal_view(withdrawal_id: str) -> dict:
+    withdrawal = await get_withdrawal(withdrawal_id)
+
+    if withdrawal is None:
+        raise WithdrawalNotFound(withdrawal_id=withdrawal_id)
+
+    return withdrawal
+
+
 @router.get(
     path="/{external_id}",
     response_model=WalletSchema,
@@ -49,9 +73,49 @@ async def get_wallet_view(wallet: dict = Depends(get_wallet)) -> dict:
     summary="Create new deposit wallet",
 )
 async def create_deposit_wallet(index: int | None = None, activate: bool = False) -> dict:
+    if index is None:
+        return await issue_deposit_wallet(activate=activate)
+
     return await create_wallet(index=index, activate=activate)
 
 
+@router.post(
+    path="/batch",
+    response_class=StreamingResponse,
+    summary="Create deposit wallets in bulk",
+    description="Created wallets are streamed back as newline-delimited JSON `WalletSchema`.",
+)
+async def create_deposit_wallets_batch(
+    count: int = Query(gt=0, le=settings.WALLET_BATCH_MAX_SIZE),
+    activate: bool = False,
+) -> StreamingResponse:
+    async def serialize():
+        # Every chunk is committed on its own as soon as it is derived and inserted.
+        async for wallets in create_wallets_batch(count=count, activate=activate):
+            for wallet in wallets:
+                yield WalletSchema.model_validate(wallet).model_dump_json() + "\n"
+
+    return StreamingResponse(serialize(), media_type="application/x-ndjson")
+
+
+@router.post(
+    path="/{external_id}/withdraw",
+    response_model=WithdrawalSchema,
+    status_code=202,
+    summary="Queue withdrawal from wallet",
+)
+async def withdraw_view(
+    withdrawal: WithdrawalRequestSchema,
+    wallet: dict = Depends(active_wallet),
+) -> dict:
+    return await enqueue_withdrawal(
+        wallet=wallet,
+        amount=withdrawal.amount,
+        to_address=withdrawal.to_address,
+        speed=withdrawal.speed,
+    )
+
+
 # @router.post("/deposit")
 # @router.get("/{address}")
 # @router.put("/deposit/{address}/enable")
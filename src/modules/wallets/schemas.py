@@ -1,8 +1,11 @@
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+from web3 import Web3
 
-from src.modules.wallets.enums import WalletStatus
+from src.modules.transactions.enums import GasPolicy
+from src.modules.wallets.enums import WalletStatus, WithdrawalStatus
 
 
 class WalletSchema(BaseModel):
@@ -13,3 +16,36 @@ class WalletSchema(BaseModel):
     index: int
     nonce: int
     status: WalletStatus
+    confirmed_balance: int
+    pending_balance: int
+
+
+class WithdrawalRequestSchema(BaseModel):
+    to_address: str
+    amount: str
+    speed: GasPolicy = GasPolicy.STANDARD
+
+    @field_validator("to_address")
+    @classmethod
+    def validate_to_address(cls, value: str) -> str:
+        if not Web3.is_address(value):
+            raise ValueError("Invalid address")
+        return Web3.to_checksum_address(value)
+
+    @field_validator("amount")
+    @classmethod
+    def validate_amount(cls, value: str) -> str:
+        try:
+            amount = Decimal(value)
+        except InvalidOperation as exc:
+            raise ValueError("Amount must be a decimal number") from exc
+
+        if not amount.is_finite() or amount <= 0:
+            raise ValueError("Amount must be positive")
+        return value
+
+
+class WithdrawalSchema(BaseModel):
+    id: str
+    status: WithdrawalStatus
+    tx_hash: str | None = None
@@ -1,26 +1,51 @@
+import asyncio
+import json
 import logging
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime
+from uuid import uuid4
 
 from eth_account.signers.local import LocalAccount
-from sqlalchemy import insert, select
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.exc import IntegrityError
 
-from src.core.config import settings, w3_obj
+from src.celery.config import BROADCAST_QUEUE
+from src.celery.config import app as celery_app
+from src.core.config import settings
+from src.core.executors import get_executor, run_in_executor
 from src.database.redis import redis
-from src.database.utils import fetch_all, fetch_one
-from src.modules.transactions.enums import GasPolicy
+from src.database.utils import execute, fetch_all, fetch_one, fetch_scalar, unit_of_work
+from src.modules.transactions.enums import GasPolicy, RawTransactionStatus
 from src.modules.transactions.exceptions import NonceIsTooLow, ReplacementTransactionUnderpriced
 from src.modules.transactions.service import (
     broadcast_transaction,
     create_raw_transaction,
+    get_raw_transaction_by_hash,
     set_raw_transaction_to_failed,
+    update_raw_transaction_status,
 )
-from src.modules.wallets.enums import WalletStatus
+from src.modules.wallets.enums import WalletStatus, WithdrawalStatus
 from src.modules.wallets.exceptions import WalletWithIndexAlreadyExists
 from src.modules.wallets.models import Wallet
-from src.modules.wallets.utils import get_account_by_index
+from src.modules.wallets.nonce import allocate_nonce, commit_nonce, release_nonce, resync_nonce
+from src.modules.wallets.utils import derive_addresses, get_account_by_index
+from src.modules.wallets.watchlist import publish_wallet_status, publish_wallets_status
 
 logger = logging.getLogger("root")
 
+WITHDRAWAL_TTL = 7 * 24 * 60 * 60  # seconds
+WITHDRAWAL_QUEUE_LOCK_TIMEOUT = 10 * 60  # seconds
+# Wallets that had withdrawals queued, and withdrawals in PROCESSING by start time.
+WITHDRAWAL_QUEUES_KEY = "EWS:withdrawal_queues"
+PROCESSING_WITHDRAWALS_KEY = "EWS:withdrawals:processing"
+
+# Key of the Postgres advisory lock serializing wallet index allocation.
+WALLET_INDEX_LOCK_ID = 0x45575349  # "EWSI"
+DERIVATION_CHUNK_SIZE = 1_000
+
 
 async def get_wallet_by_address(address: str) -> dict | None:
     wallet = await fetch_one(query=select(Wallet).where(Wallet.address == address))
@@ -68,61 +93,242 @@ async def get_account_by_wallet(wallet: dict) -> LocalAccount:
 
 
 async def get_wallets_list(active: bool | None = None) -> list[dict]:
-    query = select(Wallet)
+    # Pool wallets are not given to anyone yet.
+    query = select(Wallet).where(Wallet.issued_at.is_not(None))
 
     if active is not None:
         query = query.where(
-            Wallet.status == WalletStatus.ACTIVE if active else WalletStatus.INACTIVE
+            Wallet.status == (WalletStatus.ACTIVE if active else WalletStatus.INACTIVE)
         )
 
     return await fetch_all(query=query)
 
 
 async def get_last_wallet_index() -> int:
-    query = select(Wallet).order_by(Wallet.index.desc()).limit(1)
+    query = select(Wallet).where(Wallet.index.is_not(None)).order_by(Wallet.index.desc()).limit(1)
     wallet = await fetch_one(query=query)
     if wallet is None:
         return 0
     return wallet["index"]
 
 
+async def lock_wallet_indexes() -> None:
+    """Serialize wallet index allocation until the end of the current transaction."""
+    await execute(select(func.pg_advisory_xact_lock(WALLET_INDEX_LOCK_ID)))
+
+
 async def create_wallet(index: int | None = None, activate: bool = False) -> dict:
-    if index is None:
-        index = await get_last_wallet_index() + 1
+    async with unit_of_work():
+        if index is None:
+            await lock_wallet_indexes()
+            index = await get_last_wallet_index() + 1
 
-    account = get_account_by_index(
-        index=index, xprivate_key=settings.ETH_WALLET_XPRIV.get_secret_value()
-    )
+        account = get_account_by_index(
+            index=index, xprivate_key=settings.ETH_WALLET_XPRIV.get_secret_value()
+        )
 
-    try:
-        query = (
-            insert(Wallet)
-            .values(
-                index=index,
-                address=account.address,
-                status=WalletStatus.ACTIVE if activate else WalletStatus.INACTIVE,
+        try:
+            query = (
+                insert(Wallet)
+                .values(
+                    index=index,
+                    address=account.address,
+                    status=WalletStatus.ACTIVE if activate else WalletStatus.INACTIVE,
+                    issued_at=datetime.utcnow(),
+                )
+                .returning(Wallet)
             )
-            .returning(Wallet)
-        )
-        new_wallet = await fetch_one(query=query)
-    except IntegrityError as exc:
-        raise WalletWithIndexAlreadyExists(index) from exc
+            new_wallet = await fetch_one(query=query)
+        except IntegrityError as exc:
+            raise WalletWithIndexAlreadyExists(index) from exc
+
+        await publish_wallet_status(new_wallet)
 
     new_wallet["account"] = account
     return new_wallet
 
 
+async def _insert_wallets(
+    start_index: int, addresses: list[str], status: WalletStatus, issued_at: datetime | None
+) -> list[dict]:
+    query = (
+        insert(Wallet)
+        .values(
+            [
+                {"index": index, "address": address, "status": status, "issued_at": issued_at}
+                for index, address in enumerate(addresses, start_index)
+            ]
+        )
+        .returning(Wallet)
+    )
+    wallets = await fetch_all(query=query)
+
+    if issued_at is not None:
+        await publish_wallets_status(wallets)
+
+    return wallets
+
+
+async def create_wallets_batch(
+    count: int,
+    activate: bool = False,
+    issue: bool = True,
+) -> AsyncIterator[list[dict]]:
+    """
+    Create `count` wallets with a contiguous index range and yield them chunk by chunk,
+    in index order, as soon as every chunk is inserted.
+
+    The range is reserved by storing its last wallet under the index lock, so the lock is
+    held for a single derivation only. The rest is derived across the derivation process
+    pool, one chunk in flight per worker, and every chunk is inserted and committed on its
+    own. With `issue=False` wallets go to the pre-derived pool.
+    """
+    executor = get_executor(
+        "wallet_derivation", kind="process", max_workers=settings.WALLET_DERIVATION_WORKERS
+    )
+    window = settings.WALLET_DERIVATION_WORKERS or os.cpu_count() or 1
+    status = WalletStatus.ACTIVE if activate else WalletStatus.INACTIVE
+    issued_at = datetime.utcnow() if issue else None
+
+    async with unit_of_work(detached=True):
+        await lock_wallet_indexes()
+        start_index = await get_last_wallet_index() + 1
+        last_index = start_index + count - 1
+
+        # Index allocation continues above the last wallet once it is committed.
+        last_wallets = await _insert_wallets(
+            last_index,
+            await run_in_executor(executor, derive_addresses, last_index, last_index + 1),
+            status,
+            issued_at,
+        )
+
+    offsets = iter(range(start_index, last_index, DERIVATION_CHUNK_SIZE))
+    in_flight: deque[tuple[int, asyncio.Future[list[str]]]] = deque()
+    created = len(last_wallets)
+
+    try:
+        while True:
+            while len(in_flight) < window and (offset := next(offsets, None)) is not None:
+                stop_index = min(offset + DERIVATION_CHUNK_SIZE, last_index)
+                in_flight.append(
+                    (
+                        offset,
+                        asyncio.ensure_future(
+                            run_in_executor(executor, derive_addresses, offset, stop_index)
+                        ),
+                    )
+                )
+
+            if not in_flight:
+                break
+
+            offset, addresses = in_flight.popleft()
+            async with unit_of_work(detached=True):
+                wallets = await _insert_wallets(offset, await addresses, status, issued_at)
+
+            created += len(wallets)
+            yield wallets
+    finally:
+        # Consumer stopped early (client gone, error), drop derivations nobody will store.
+        for _, addresses in in_flight:
+            addresses.cancel()
+
+    yield last_wallets
+
+    logger.info(f"Created {created} wallets, indexes {start_index}..{last_index}")
+
+
+def _pool_wallets_filter() -> tuple:
+    return (
+        Wallet.status == WalletStatus.INACTIVE,
+        Wallet.issued_at.is_(None),
+        Wallet.index.is_not(None),
+    )
+
+
+async def get_wallet_pool_size() -> int:
+    query = select(func.count()).select_from(Wallet).where(*_pool_wallets_filter())
+    return await fetch_scalar(query)
+
+
+async def fill_wallet_pool() -> int:
+    """Top up the pre-derived wallet pool to WALLET_POOL_SIZE, returns created wallets count."""
+    missing = settings.WALLET_POOL_SIZE - await get_wallet_pool_size()
+
+    if missing <= 0:
+        return 0
+
+    created = 0
+    async for wallets in create_wallets_batch(
+        count=min(missing, settings.WALLET_POOL_FILL_BATCH), activate=False, issue=False
+    ):
+        created += len(wallets)
+
+    logger.info(f"Wallet pool filled with {created} wallets")
+    return created
+
+
+async def claim_pool_wallet(activate: bool = True) -> dict | None:
+    """
+    Hand out one pre-derived wallet from the pool in a single statement. Concurrent claims
+    skip rows locked by each other instead of waiting. Returns None if the pool is empty.
+    """
+    pool_wallet_id = (
+        select(Wallet.id)
+        .where(*_pool_wallets_filter())
+        .order_by(Wallet.index)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    query = (
+        update(Wallet)
+        .where(Wallet.id == pool_wallet_id)
+        .values(
+            status=WalletStatus.ACTIVE if activate else WalletStatus.INACTIVE,
+            issued_at=datetime.utcnow(),
+        )
+        .returning(Wallet)
+        .execution_options(synchronize_session=False)
+    )
+    wallet = await fetch_one(query=query)
+
+    if wallet is None:
+        logger.warning("Wallet pool is empty")
+        return None
+
+    await publish_wallet_status(wallet)
+
+    return wallet
+
+
+async def issue_deposit_wallet(activate: bool = True) -> dict:
+    wallet = await claim_pool_wallet(activate=activate)
+
+    if wallet is None:
+        # Pool is drained, fall back to deriving inline.
+        wallet = await create_wallet(activate=activate)
+
+    return wallet
+
+
 async def activate_wallet(disabled_wallet: dict) -> dict | None:
     if disabled_wallet["status"] == WalletStatus.ACTIVE:
         raise ValueError("Wallet is already inactive")
 
     query = (
-        Wallet.update()
+        update(Wallet)
         .where(Wallet.address == disabled_wallet["address"])
         .values(status=WalletStatus.ACTIVE)
         .returning(Wallet)
     )
-    return await fetch_one(query=query)
+    wallet = await fetch_one(query=query)
+
+    if wallet is not None:
+        await publish_wallet_status(wallet)
+
+    return wallet
 
 
 async def deactivate_wallet(active_wallet: dict) -> dict | None:
@@ -133,13 +339,17 @@ async def deactivate_wallet(active_wallet: dict) -> dict | None:
         raise ValueError("Main wallet cannot be deactivated")
 
     query = (
-        Wallet.update()
+        update(Wallet)
         .where(Wallet.address == active_wallet["address"])
         .values(status=WalletStatus.INACTIVE)
         .returning(Wallet)
     )
+    wallet = await fetch_one(query=query)
+
+    if wallet is not None:
+        await publish_wallet_status(wallet)
 
-    return await fetch_one(query=query)
+    return wallet
 
 
 async def get_deposit_list() -> list[dict]:
@@ -147,58 +357,307 @@ async def get_deposit_list() -> list[dict]:
     return await fetch_all(query=query)
 
 
-async def get_wallet_nonce(wallet: dict) -> int:
-    cached_nonce = await redis.get(f"EWS:{wallet['external_id']}:nonce")
-
-    if cached_nonce is not None:
-        return int(cached_nonce)
-
-    return await w3_obj.eth.get_transaction_count(wallet["address"])
-
-
-async def update_wallet_nonce(wallet: dict, nonce: int) -> None:
-    wallet_id = wallet["external_id"]
-    await redis.set(f"EWS:{wallet_id}:nonce", nonce)
-
-
 async def withdraw_from_wallet(
     wallet: dict,
     amount: str,
     to_address: str,
     speed: GasPolicy = GasPolicy.STANDARD,
+    retries: int = settings.WITHDRAW_MAX_RETRIES,
+    on_created: Callable[[dict], Awaitable[None]] | None = None,
 ) -> dict:
-    # Get nonce of the wallet
-    nonce = await get_wallet_nonce(wallet=wallet)
+    """
+    Sign and broadcast a transfer from the wallet. `on_created` is awaited with every raw
+    transaction stored before it is broadcast, retries after a nonce conflict included.
+    """
+    # Reserve nonce of the wallet, concurrent withdrawals get sequential nonces.
+    nonce = await allocate_nonce(wallet=wallet)
 
-    raw_transaction = await create_raw_transaction(
-        amount=amount,
-        transaction_to=to_address,
-        wallet=wallet,
-        gas_policy=speed,
-        nonce=nonce,
-    )
+    try:
+        raw_transaction = await create_raw_transaction(
+            amount=amount,
+            transaction_to=to_address,
+            wallet=wallet,
+            gas_policy=speed,
+            nonce=nonce,
+        )
+    except Exception:
+        await release_nonce(wallet=wallet, nonce=nonce)
+        raise
+
+    if on_created is not None:
+        await on_created(raw_transaction)
 
     try:
         raw_transaction = await broadcast_transaction(raw_transaction=raw_transaction)
-    except (NonceIsTooLow, ReplacementTransactionUnderpriced) as exc:
+    except (NonceIsTooLow, ReplacementTransactionUnderpriced):
+        # Nonce is already used on chain or in the mempool.
         await set_raw_transaction_to_failed(raw_transaction=raw_transaction)
+        next_nonce = await resync_nonce(wallet=wallet)
 
-        if isinstance(exc, NonceIsTooLow):
-            nonce = await w3_obj.eth.get_transaction_count(wallet["address"])
-        elif isinstance(exc, ReplacementTransactionUnderpriced):
-            nonce = wallet["nonce"] + 1
-        else:
+        if retries <= 0:
             raise
 
         logger.warning(
-            f"Nonce ({wallet['nonce']} is too low for wallet {wallet['address']}."
-            f" Retrying with {nonce}"
+            f"Nonce {nonce} is already used for wallet {wallet['address']}."
+            f" Retrying with {next_nonce}, {retries} retries left"
         )
-        await update_wallet_nonce(wallet=wallet, nonce=nonce)
         return await withdraw_from_wallet(
-            wallet=wallet, amount=amount, to_address=to_address, speed=speed
+            wallet=wallet,
+            amount=amount,
+            to_address=to_address,
+            speed=speed,
+            retries=retries - 1,
+            on_created=on_created,
+        )
+    except ValueError:
+        # Node answered with an error, the transaction was rejected and the nonce is unused.
+        await set_raw_transaction_to_failed(raw_transaction=raw_transaction)
+        await release_nonce(wallet=wallet, nonce=nonce)
+        raise
+    except Exception as exc:
+        # Transport error (timeout, reset connection), the node may have accepted it. The
+        # nonce stays in flight and the accelerator re-broadcasts the transaction if it is
+        # not mined, the scanner picks it up if it is.
+        logger.warning(
+            f"Outcome of broadcasting {raw_transaction['tx_hash']} from {wallet['address']}"
+            f" is unknown: {exc!r}",
+            extra={"wallet": wallet["external_id"], "tx_hash": raw_transaction["tx_hash"]},
+        )
+        return await update_raw_transaction_status(
+            raw_transaction, RawTransactionStatus.BROADCASTED
         )
 
-    await update_wallet_nonce(wallet=wallet, nonce=raw_transaction["nonce"] + 1)
+    await commit_nonce(wallet=wallet, nonce=nonce)
 
     return raw_transaction
+
+
+def _withdrawal_queue_key(wallet_external_id: str) -> str:
+    return f"EWS:{wallet_external_id}:withdrawals"
+
+
+def _withdrawal_key(withdrawal_id: str) -> str:
+    return f"EWS:withdrawal:{withdrawal_id}"
+
+
+async def get_withdrawal(withdrawal_id: str) -> dict | None:
+    withdrawal = await redis.hgetall(_withdrawal_key(withdrawal_id))
+
+    if not withdrawal:
+        return None
+
+    return {
+        "id": withdrawal_id,
+        **{key.decode(): value.decode() for key, value in withdrawal.items()},
+    }
+
+
+async def _set_withdrawal_status(
+    withdrawal_id: str, status: WithdrawalStatus, tx_hash: str | None = None
+) -> None:
+    mapping = {"status": status.value}
+    if tx_hash:
+        mapping["tx_hash"] = tx_hash
+
+    await redis.hset(_withdrawal_key(withdrawal_id), mapping=mapping)
+    await redis.expire(_withdrawal_key(withdrawal_id), WITHDRAWAL_TTL)
+
+    if status == WithdrawalStatus.PROCESSING:
+        await redis.zadd(PROCESSING_WITHDRAWALS_KEY, {withdrawal_id: time.time()})
+    else:
+        await redis.zrem(PROCESSING_WITHDRAWALS_KEY, withdrawal_id)
+
+
+async def _dispatch_broadcaster(wallet_external_id: str) -> None:
+    await asyncio.to_thread(
+        celery_app.send_task,
+        "broadcast_withdrawals",
+        args=[wallet_external_id],
+        queue=BROADCAST_QUEUE,
+    )
+
+
+async def _queue_withdrawal(wallet_external_id: str, withdrawal: dict) -> None:
+    await redis.rpush(_withdrawal_queue_key(wallet_external_id), json.dumps(withdrawal))
+    await redis.sadd(WITHDRAWAL_QUEUES_KEY, wallet_external_id)
+
+
+async def enqueue_withdrawal(
+    wallet: dict,
+    amount: str,
+    to_address: str,
+    speed: GasPolicy = GasPolicy.STANDARD,
+) -> dict:
+    """
+    Accept a withdrawal into the durable per-wallet queue drained by the broadcaster worker.
+    """
+    withdrawal = {
+        "id": str(uuid4()),
+        "amount": amount,
+        "to_address": to_address,
+        "speed": speed.value,
+    }
+
+    # Kept with the status, so a withdrawal left in PROCESSING can be queued again.
+    await redis.hset(
+        _withdrawal_key(withdrawal["id"]),
+        mapping={**withdrawal, "wallet": wallet["external_id"]},
+    )
+    await _set_withdrawal_status(withdrawal["id"], WithdrawalStatus.ACCEPTED)
+    await _queue_withdrawal(wallet["external_id"], withdrawal)
+    await _dispatch_broadcaster(wallet["external_id"])
+
+    logger.info(
+        f"Withdrawal {withdrawal['id']} of {amount} ETH to {to_address} accepted",
+        extra={"wallet": wallet["external_id"]},
+    )
+    return {"id": withdrawal["id"], "status": WithdrawalStatus.ACCEPTED}
+
+
+async def _process_withdrawal(wallet: dict, withdrawal: dict) -> None:
+    current = await get_withdrawal(withdrawal["id"])
+
+    if current and current["status"] != WithdrawalStatus.ACCEPTED:
+        # Worker died after picking it up, never re-send money automatically.
+        logger.error(
+            f"Withdrawal {withdrawal['id']} is already {current['status']}, skipping",
+            extra={"wallet": wallet["external_id"]},
+        )
+        return
+
+    await _set_withdrawal_status(withdrawal["id"], WithdrawalStatus.PROCESSING)
+
+    async def record_transaction(raw_transaction: dict) -> None:
+        # Tells `recover_withdrawal` what was signed if the worker dies while broadcasting.
+        await redis.hset(_withdrawal_key(withdrawal["id"]), "tx_hash", raw_transaction["tx_hash"])
+
+    try:
+        raw_transaction = await withdraw_from_wallet(
+            wallet=wallet,
+            amount=withdrawal["amount"],
+            to_address=withdrawal["to_address"],
+            speed=GasPolicy(withdrawal["speed"]),
+            on_created=record_transaction,
+        )
+    except Exception as exc:
+        logger.exception(
+            f"Withdrawal {withdrawal['id']} failed: {exc}", extra={"wallet": wallet["external_id"]}
+        )
+        await _set_withdrawal_status(withdrawal["id"], WithdrawalStatus.FAILED)
+        return
+
+    await _set_withdrawal_status(
+        withdrawal["id"], WithdrawalStatus.BROADCASTED, tx_hash=raw_transaction["tx_hash"]
+    )
+
+
+async def process_withdrawal_queue(wallet_external_id: str) -> int:
+    """
+    Drain queued withdrawals of one wallet in batches, signing and broadcasting them
+    back-to-back with sequential nonces. Returns the number of processed withdrawals.
+    """
+    queue_key = _withdrawal_queue_key(wallet_external_id)
+    lock = redis.lock(f"{queue_key}:lock", timeout=WITHDRAWAL_QUEUE_LOCK_TIMEOUT)
+    processed = 0
+
+    # Only one broadcaster per wallet, others leave the queue to the lock holder.
+    while await redis.llen(queue_key) and await lock.acquire(blocking=False):
+        try:
+            wallet = await get_wallet_by_external_id(wallet_external_id)
+
+            while items := await redis.lrange(queue_key, 0, settings.WITHDRAWAL_BATCH_SIZE - 1):
+                for item in items:
+                    await _process_withdrawal(wallet, json.loads(item))
+
+                await redis.ltrim(queue_key, len(items), -1)
+                processed += len(items)
+        finally:
+            await lock.release()
+
+    if processed:
+        logger.info(f"Processed {processed} withdrawals", extra={"wallet": wallet_external_id})
+    return processed
+
+
+async def recover_withdrawal(withdrawal: dict) -> WithdrawalStatus:
+    """
+    Settle a withdrawal whose broadcaster died in PROCESSING. Never signs anything: if no
+    raw transaction was stored for it, nothing was sent and it is queued again, otherwise
+    its status follows the stored raw transaction. Returns the new status.
+    """
+    raw_transaction = None
+    if withdrawal.get("tx_hash"):
+        raw_transaction = await get_raw_transaction_by_hash(withdrawal["tx_hash"])
+
+    if raw_transaction is None:
+        status = WithdrawalStatus.ACCEPTED
+        await _set_withdrawal_status(withdrawal["id"], status)
+        await _queue_withdrawal(
+            withdrawal["wallet"],
+            {key: withdrawal[key] for key in ("id", "amount", "to_address", "speed")},
+        )
+    elif raw_transaction["status"] == RawTransactionStatus.FAILED:
+        status = WithdrawalStatus.FAILED
+        await _set_withdrawal_status(withdrawal["id"], status)
+    else:
+        if raw_transaction["status"] == RawTransactionStatus.CREATED:
+            # Died around the broadcast call, the node may have it. Same as a transport
+            # error: the accelerator re-broadcasts it if it is not mined.
+            await update_raw_transaction_status(raw_transaction, RawTransactionStatus.BROADCASTED)
+
+        status = WithdrawalStatus.BROADCASTED
+        await _set_withdrawal_status(withdrawal["id"], status, tx_hash=raw_transaction["tx_hash"])
+
+    logger.warning(
+        f"Withdrawal {withdrawal['id']} was left in PROCESSING, recovered as {status.value}",
+        extra={"wallet": withdrawal["wallet"]},
+    )
+    return status
+
+
+async def redrive_withdrawals() -> int:
+    """
+    Safety net of the withdrawal queues, run by beat. Recovers withdrawals left in
+    PROCESSING for over WITHDRAWAL_PROCESSING_TIMEOUT and dispatches a broadcaster for every
+    wallet with queued withdrawals, in case a task was lost. Returns the number of queues.
+    """
+    # Longer than the queue lock lives, the broadcaster that took it can not be running.
+    started_before = time.time() - settings.WITHDRAWAL_PROCESSING_TIMEOUT
+    for withdrawal_id in await redis.zrangebyscore(
+        PROCESSING_WITHDRAWALS_KEY, "-inf", started_before
+    ):
+        withdrawal = await get_withdrawal(withdrawal_id.decode())
+
+        if withdrawal is None or withdrawal["status"] != WithdrawalStatus.PROCESSING:
+            # Expired, or finished right after the range was read.
+            await redis.zrem(PROCESSING_WITHDRAWALS_KEY, withdrawal_id)
+            continue
+
+        if "wallet" not in withdrawal:
+            logger.error(
+                f"Withdrawal {withdrawal['id']} was left in PROCESSING and was queued without"
+                " its details, it has to be settled by hand"
+            )
+            await redis.zrem(PROCESSING_WITHDRAWALS_KEY, withdrawal_id)
+            continue
+
+        await recover_withdrawal(withdrawal)
+
+    queues = 0
+    for wallet_external_id in await redis.smembers(WITHDRAWAL_QUEUES_KEY):
+        wallet_external_id = wallet_external_id.decode()
+        queue_key = _withdrawal_queue_key(wallet_external_id)
+
+        if not await redis.llen(queue_key):
+            await redis.srem(WITHDRAWAL_QUEUES_KEY, wallet_external_id)
+            # A withdrawal queued in between must not be forgotten.
+            if not await redis.llen(queue_key):
+                continue
+            await redis.sadd(WITHDRAWAL_QUEUES_KEY, wallet_external_id)
+
+        await _dispatch_broadcaster(wallet_external_id)
+        queues += 1
+
+    if queues:
+        logger.info(f"Re-dispatched broadcasters of {queues} withdrawal queues")
+    return queues
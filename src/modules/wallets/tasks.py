@@ -0,0 +1,35 @@
+import asyncio
+
+from src.celery.config import BROADCAST_QUEUE, WALLETS_QUEUE, app
+from src.modules.wallets.service import (
+    fill_wallet_pool,
+    process_withdrawal_queue,
+    redrive_withdrawals,
+)
+
+
+@app.task(
+    name="fill_wallet_pool",
+    queue=WALLETS_QUEUE,
+    ignore_result=True,
+)
+def fill_wallet_pool_task():
+    asyncio.run(fill_wallet_pool())
+
+
+@app.task(
+    name="broadcast_withdrawals",
+    queue=BROADCAST_QUEUE,
+    ignore_result=True,
+)
+def broadcast_withdrawals(wallet_external_id: str):
+    asyncio.run(process_withdrawal_queue(wallet_external_id))
+
+
+@app.task(
+    name="redrive_withdrawals",
+    queue=BROADCAST_QUEUE,
+    ignore_result=True,
+)
+def redrive_withdrawals_task():
+    asyncio.run(redrive_withdrawals())
@@ -1,10 +1,16 @@
+from copy import copy
+from functools import lru_cache
+
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
-from hdwallet import BIP44HDWallet
-from hdwallet.cryptocurrencies import EthereumMainnet
-from hdwallet.derivations import BIP44Derivation
+from hdwallet import BIP44HDWallet, HDWallet
 from hdwallet.symbols import ETH
 
+from src.core.config import settings
+
+# BIP44 external chain of the first Ethereum account, wallet index is the last path level.
+ACCOUNT_CHAIN_PATH = "m/44'/60'/0'/0"
+
 
 def get_main_account(xprivate_key: str) -> LocalAccount:
     bip44_hdwallet = BIP44HDWallet(symbol=ETH)
@@ -14,26 +20,44 @@ def get_main_account(xprivate_key: str) -> LocalAccount:
     return Account.from_key(deposit_private_key)
 
 
-def get_account_by_index(xprivate_key: str, index: int) -> LocalAccount:
-    bip44_hdwallet = BIP44HDWallet(symbol=ETH)
-    bip44_hdwallet.from_xprivate_key(xprivate_key=xprivate_key)
-    bip44_hdwallet.clean_derivation()
-    bip44_derivation = BIP44Derivation(
-        cryptocurrency=EthereumMainnet, account=0, change=False, address=index
-    )
-
-    bip44_hdwallet.from_path(path=bip44_derivation)
-    deposit_private_key = bip44_hdwallet.private_key()
+@lru_cache(maxsize=4)
+def get_account_chain_node(xprivate_key: str) -> HDWallet:
+    """
+    Parse the root key and walk the hardened part of the path once, returning the
+    `m/44'/60'/0'/0` node every wallet index is derived from. The node is shared, never
+    derive from it in place.
+    """
+    hdwallet = HDWallet(symbol=ETH)
+    hdwallet.from_xprivate_key(xprivate_key=xprivate_key)
+    hdwallet.from_path(path=ACCOUNT_CHAIN_PATH)
+    return hdwallet
+
+
+def derive_account(xprivate_key: str, index: int) -> LocalAccount:
+    # Single non-hardened child step from the cached m/44'/60'/0'/0 node. Deriving only
+    # rebinds attributes of the wallet, so a shallow copy keeps the cached node intact.
+    hdwallet = copy(get_account_chain_node(xprivate_key))
+    hdwallet.from_index(index)
+    deposit_private_key = hdwallet.private_key()
     return Account.from_key(deposit_private_key)
 
 
-def get_address_by_index_xpk(index: int, xprivate_key: str) -> str:
-    bip44_hdwallet = BIP44HDWallet(symbol=ETH)
-    bip44_hdwallet.from_xprivate_key(xprivate_key=xprivate_key)
-    bip44_hdwallet.clean_derivation()
-    bip44_derivation = BIP44Derivation(
-        cryptocurrency=EthereumMainnet, account=0, change=False, address=index
-    )
+@lru_cache(maxsize=settings.HD_ACCOUNT_CACHE_SIZE)
+def get_account_by_index(xprivate_key: str, index: int) -> LocalAccount:
+    return derive_account(xprivate_key=xprivate_key, index=index)
 
-    bip44_hdwallet.from_path(path=bip44_derivation)
-    return bip44_hdwallet.p2pkh_address()
+
+def get_address_by_index_xpk(index: int, xprivate_key: str) -> str:
+    return get_account_by_index(xprivate_key=xprivate_key, index=index).address
+
+
+def derive_addresses(start_index: int, stop_index: int) -> list[str]:
+    """
+    Derive addresses for indexes in [start_index, stop_index). Runs in worker processes,
+    the key is read from settings there so it never crosses the process boundary.
+    """
+    xprivate_key = settings.ETH_WALLET_XPRIV.get_secret_value()
+    return [
+        derive_account(xprivate_key=xprivate_key, index=index).address
+        for index in range(start_index, stop_index)
+    ]
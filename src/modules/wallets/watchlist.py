@@ -0,0 +1,88 @@
+import logging
+
+from sqlalchemy import select
+
+from src.database.redis import redis
+from src.database.utils import after_commit, fetch_all
+from src.modules.wallets.models import Wallet
+
+logger = logging.getLogger("root")
+
+WATCHLIST_VERSION_KEY = "EWS:watchlist:version"
+
+
+class WatchedAddressIndex:
+    """
+    Process-local index of issued wallet addresses, so the scanner can tell whether a
+    transaction touches one of our wallets without any I/O. Deposits reach inactive
+    wallets as well, only pre-derived pool wallets nobody was given yet are left out.
+
+    Every process keeps its own copy. Writers bump a version counter in Redis after they
+    issue a wallet or change its status, and readers call `refresh()` (one Redis GET) to
+    reload from the `wallet` table only when that counter has moved.
+    """
+
+    def __init__(self) -> None:
+        self._wallets: dict[str, dict] = {}
+        self._version: int | None = None
+        self._loaded = False
+
+    def __contains__(self, address: str | None) -> bool:
+        return address in self._wallets
+
+    def __len__(self) -> int:
+        return len(self._wallets)
+
+    def get(self, address: str | None) -> dict | None:
+        return self._wallets.get(address)
+
+    def add(self, wallet: dict) -> None:
+        self._wallets[wallet["address"]] = {
+            key: value for key, value in wallet.items() if key != "account"
+        }
+
+    def discard(self, address: str) -> None:
+        self._wallets.pop(address, None)
+
+    async def load(self) -> None:
+        version = await redis.get(WATCHLIST_VERSION_KEY)
+        # Version was bumped after commit on the primary, a lagging replica could miss it.
+        wallets = await fetch_all(
+            select(Wallet).where(Wallet.issued_at.is_not(None)), use_primary=True
+        )
+
+        self._wallets = {}
+        for wallet in wallets:
+            self.add(wallet)
+
+        self._version = int(version) if version else 0
+        self._loaded = True
+        logger.info(f"Loaded {len(self)} watched addresses, version={self._version}")
+
+    async def refresh(self) -> None:
+        version = await redis.get(WATCHLIST_VERSION_KEY)
+
+        if not self._loaded or (int(version) if version else 0) != self._version:
+            await self.load()
+
+
+watched_addresses = WatchedAddressIndex()
+
+
+async def publish_wallet_status(wallet: dict) -> None:
+    """Apply wallet issuance or status change to the local index and notify other processes."""
+    await publish_wallets_status([wallet])
+
+
+async def publish_wallets_status(wallets: list[dict]) -> None:
+    async def _publish() -> None:
+        for wallet in wallets:
+            if wallet["issued_at"] is not None:
+                watched_addresses.add(wallet)
+            else:
+                watched_addresses.discard(wallet["address"])
+
+        await redis.incr(WATCHLIST_VERSION_KEY)
+
+    # Other processes reload from the database, they must see the committed rows.
+    await after_commit(_publish)
@@ -0,0 +1,148 @@
+"""
+Checks here run against a scratch Postgres database given by TEST_DATABASE_URI
+(`postgresql+asyncpg://...`). Its `public` schema is dropped and migrated from scratch,
+never point it at a database you care about. Without TEST_DATABASE_URI every test is
+skipped.
+"""
+
+import asyncio
+import os
+from typing import Any
+
+import pytest
+
+TEST_DATABASE_URI = os.environ.get("TEST_DATABASE_URI")
+
+if TEST_DATABASE_URI:
+    os.environ["DATABASE_URI"] = TEST_DATABASE_URI
+    os.environ["DATABASE_READ_URI"] = ""
+
+# Settings are required on import, tests never reach the node, Redis or Celery.
+os.environ.setdefault("DATABASE_URI", "postgresql+asyncpg://localhost/test")
+os.environ.setdefault("REDIS_URI", "redis://localhost:6379/1")
+os.environ.setdefault("CELERY_BROKER_URL", "redis://localhost:6379/2")
+os.environ.setdefault("ETH_RPC_URL", "http://localhost:8545")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault(
+    "ETH_WALLET_XPRIV",
+    # BIP-32 test vector 1 master key.
+    "xprv9s21ZrQH143K3QTDL4LXw2F7HEK3wJUD2nW2nRk4stbPy6cq3jPPqjiChkVvvNKmPGJxWUtg6LnF5kejMRNNU3TGtRBeJgk33yuGBxrMPHi",
+)
+
+
+@pytest.fixture(scope="session")
+def loop():
+    # Engine connections are bound to the loop they were opened on, share one.
+    from src.database.engine import async_engine
+
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def migrated_database(loop):
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+
+    from src.core.config import BASE_DIR
+    from src.database.engine import async_engine
+
+    async def reset_schema() -> None:
+        async with async_engine.begin() as connection:
+            await connection.execute(text("DROP SCHEMA public CASCADE"))
+            await connection.execute(text("CREATE SCHEMA public"))
+
+    loop.run_until_complete(reset_schema())
+
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "migrations"))
+    # Alembic runs its own event loop, it must not be nested in ours.
+    command.upgrade(config, "head")
+
+
+class FakeRedis:
+    """Commands the services send to Redis, replies are bytes as with redis-py."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    async def get(self, key: str) -> bytes | None:
+        return self.data.get(key)
+
+    async def incr(self, key: str) -> int:
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = self._encode(value)
+        return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+    async def hset(
+        self, key: str, field: str | None = None, value: Any = None, mapping: dict | None = None
+    ) -> int:
+        fields = {**(mapping or {}), **({field: value} if field is not None else {})}
+        self.data.setdefault(key, {}).update(
+            {self._encode(name): self._encode(value) for name, value in fields.items()}
+        )
+        return len(fields)
+
+    async def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return dict(self.data.get(key, {}))
+
+    async def rpush(self, key: str, *values: Any) -> int:
+        items = self.data.setdefault(key, [])
+        items.extend(self._encode(value) for value in values)
+        return len(items)
+
+    async def llen(self, key: str) -> int:
+        return len(self.data.get(key, []))
+
+    async def lrange(self, key: str, start: int, stop: int) -> list[bytes]:
+        return self.data.get(key, [])[start : None if stop == -1 else stop + 1]
+
+    async def sadd(self, key: str, *members: Any) -> int:
+        items = self.data.setdefault(key, set())
+        added = {self._encode(member) for member in members} - items
+        items.update(added)
+        return len(added)
+
+    async def srem(self, key: str, *members: Any) -> int:
+        items = self.data.get(key, set())
+        removed = {self._encode(member) for member in members} & items
+        items.difference_update(removed)
+        return len(removed)
+
+    async def smembers(self, key: str) -> set[bytes]:
+        return set(self.data.get(key, set()))
+
+    async def zadd(self, key: str, mapping: dict) -> int:
+        items = self.data.setdefault(key, {})
+        items.update({self._encode(member): score for member, score in mapping.items()})
+        return len(mapping)
+
+    async def zrem(self, key: str, *members: Any) -> int:
+        items = self.data.get(key, {})
+        return sum(items.pop(self._encode(member), None) is not None for member in members)
+
+    async def zrangebyscore(self, key: str, low: Any, high: Any) -> list[bytes]:
+        low, high = float(low), float(high)
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        return [member for member, score in items if low <= score <= high]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch) -> FakeRedis:
+    """In-memory Redis for the wallet watchlist and withdrawal queues."""
+    from src.modules.wallets import service, watchlist
+
+    fake = FakeRedis()
+    monkeypatch.setattr(watchlist, "redis", fake)
+    monkeypatch.setattr(service, "redis", fake)
+    return fake
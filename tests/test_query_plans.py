@@ -0,0 +1,260 @@
+"""
+EXPLAIN every statement the service calls in SERVICE_CALLS send and fail on sequential
+scans of the transaction and wallet tables. Tables are seeded with enough rows and ANALYZEd, so the
+planner picks what it would in production once they grow: an index scan, or a Seq Scan
+when the index the query relies on is missing.
+"""
+
+import os
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+from hexbytes import HexBytes
+from sqlalchemy import event, text
+
+from src.database.engine import async_engine
+from src.database.utils import fetch_rows
+from src.modules.clearing.service import get_busy_addresses
+from src.modules.reconciliation.service import get_wallets_chunk
+from src.modules.transactions.enums import RawTransactionStatus, TransactionDirection
+from src.modules.transactions.service import (
+    _archive_batch_query,
+    archive_finalized_transactions,
+    confirm_pending_raw_transactions,
+    create_system_transactions,
+    drop_replaced_raw_transactions,
+    get_raw_transaction_by_external_id,
+    get_raw_transaction_by_hash,
+    get_raw_transaction_by_id,
+    get_stuck_raw_transactions,
+    set_raw_transaction_to_failed,
+    upsert_raw_transactions_from_blockchain,
+)
+from src.modules.wallets.service import (
+    claim_pool_wallet,
+    get_deposit_list,
+    get_last_wallet_index,
+    get_wallet_by_address,
+    get_wallet_by_external_id,
+    get_wallet_pool_size,
+    get_wallets_list,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URI"), reason="TEST_DATABASE_URI is not set"
+)
+
+WALLETS = 20_000
+RAW_TRANSACTIONS = 100_000
+SCANNED_TABLES = {"raw_transaction", "system_transaction", "wallet"}
+
+SEED_STATEMENTS = [
+    # 10% active deposit wallets, 10% unissued pool wallets, the rest issued and inactive.
+    f"""
+    INSERT INTO wallet (
+        external_id, created_at, updated_at, deleted, address, status, nonce, index,
+        issued_at, confirmed_balance, pending_balance
+    )
+    SELECT
+        'wallet-' || i, now(), now(), false, '0x' || lpad(to_hex(i), 40, '0'),
+        CASE WHEN i % 10 = 0 THEN 'ACTIVE' ELSE 'INACTIVE' END, 0, i,
+        CASE WHEN i % 10 = 1 THEN NULL ELSE now() END, 0, 0
+    FROM generate_series(1, {WALLETS}) AS i
+    """,
+    # Terminal statuses dominate, a fraction of a percent is still in flight.
+    f"""
+    INSERT INTO raw_transaction (
+        external_id, created_at, updated_at, deleted, status, tx_hash, tx_from, tx_to,
+        tx_value, tx_fee, gas_limit, nonce, block_number, confirmation_count,
+        confirmation_need, max_fee_per_gas, max_priority_fee_per_gas
+    )
+    SELECT
+        'raw-' || i, now() - interval '1 hour', now() - interval '1 hour', false,
+        CASE
+            WHEN i % 1000 = 0 THEN 'CREATED'
+            WHEN i % 1000 < 3 THEN 'BROADCASTED'
+            WHEN i % 1000 < 8 THEN 'PENDING'
+            WHEN i % 1000 < 50 THEN 'FAILED'
+            ELSE 'CONFIRMED'
+        END,
+        decode(lpad(to_hex(i), 64, '0'), 'hex'),
+        decode(lpad(to_hex(i % {WALLETS} + 1), 40, '0'), 'hex'),
+        decode(lpad(to_hex((i + 1) % {WALLETS} + 1), 40, '0'), 'hex'),
+        1000000000000000, 21000000000000, 21000, i / {WALLETS}, i, 12, 12,
+        1000000000, 1000000000
+    FROM generate_series(1, {RAW_TRANSACTIONS}) AS i
+    """,
+    """
+    INSERT INTO system_transaction (
+        external_id, created_at, updated_at, deleted, origin_id, wallet_id, amount, status,
+        direction
+    )
+    SELECT
+        'system-' || id, created_at, updated_at, false, id, id % 20000 + 1, '0.001',
+        CASE status
+            WHEN 'CONFIRMED' THEN 'CONFIRMED'
+            WHEN 'FAILED' THEN 'FAILED'
+            WHEN 'CREATED' THEN 'CREATED'
+            ELSE 'PENDING'
+        END,
+        'OUT'
+    FROM raw_transaction
+    """,
+    "ANALYZE wallet",
+    "ANALYZE raw_transaction",
+    "ANALYZE system_transaction",
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_database(loop, migrated_database):
+    async def seed() -> None:
+        async with async_engine.begin() as connection:
+            for statement in SEED_STATEMENTS:
+                await connection.execute(text(statement))
+
+    loop.run_until_complete(seed())
+
+
+@pytest.fixture
+def explain(
+    loop, seeded_database, fake_redis
+) -> Callable[[Callable[[], Awaitable[Any]]], list[dict]]:
+    """Run a service call and return the JSON plans of every statement it sent."""
+
+    def run(call: Callable[[], Awaitable[Any]]) -> list[dict]:
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+            statements.append((statement, parameters))
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            loop.run_until_complete(call())
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+        async def explain_statements() -> list[dict]:
+            plans = []
+            async with async_engine.connect() as connection:
+                for statement, parameters in statements:
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                    )
+                    plans.append({"statement": statement, "plan": result.scalar()[0]["Plan"]})
+                await connection.rollback()
+            return plans
+
+        return loop.run_until_complete(explain_statements())
+
+    return run
+
+
+def seq_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan["Node Type"] == "Seq Scan" and plan["Relation Name"] in SCANNED_TABLES:
+        scans.append(plan["Relation Name"])
+
+    for child in plan.get("Plans", []):
+        scans.extend(seq_scans(child))
+
+    return scans
+
+
+def raw_hash(i: int) -> str:
+    return "0x" + f"{i:064x}"
+
+
+def address(i: int) -> str:
+    return "0x" + f"{i:040x}"
+
+
+def mined_transaction(i: int) -> tuple[dict, dict]:
+    transaction = {
+        "hash": HexBytes(raw_hash(i)),
+        "from": address(3),
+        "to": address(4),
+        "value": 10**15,
+        "input": HexBytes("0x"),
+        "gasPrice": 10**9,
+        "gas": 21000,
+        "nonce": 0,
+        "blockNumber": i,
+        "maxFeePerGas": 10**9,
+        "maxPriorityFeePerGas": 10**9,
+    }
+    return transaction, {"gasUsed": 21000, "effectiveGasPrice": 10**9}
+
+
+# Left out on purpose: `get_wallets_list()` and `get_wallets_list(active=False)` return
+# every issued or every inactive wallet, most of the table, a Seq Scan is the best plan.
+SERVICE_CALLS = {
+    "get_raw_transaction_by_hash": lambda: get_raw_transaction_by_hash(raw_hash(500)),
+    "get_raw_transaction_by_external_id": lambda: get_raw_transaction_by_external_id("raw-500"),
+    "get_raw_transaction_by_id": lambda: get_raw_transaction_by_id(500),
+    # Head below every block, so nothing crosses the threshold and the node is not called.
+    "confirm_pending_raw_transactions": lambda: confirm_pending_raw_transactions(0),
+    "get_stuck_raw_transactions": lambda: get_stuck_raw_transactions(datetime.utcnow()),
+    "get_busy_addresses": get_busy_addresses,
+    "set_raw_transaction_to_failed": lambda: set_raw_transaction_to_failed({"id": 1001}),
+    "drop_replaced_raw_transactions": lambda: drop_replaced_raw_transactions(
+        [{"tx_from": address(2), "nonce": 0, "tx_hash": raw_hash(999_999)}]
+    ),
+    "claim_pool_wallet": lambda: claim_pool_wallet(activate=False),
+    "get_wallet_by_address": lambda: get_wallet_by_address(address(500)),
+    "get_wallet_by_external_id": lambda: get_wallet_by_external_id("wallet-500"),
+    "get_last_wallet_index": get_last_wallet_index,
+    "get_wallets_chunk": lambda: get_wallets_chunk(10_000, 1_000),
+    "get_deposit_list": get_deposit_list,
+    "get_wallets_list(active=True)": lambda: get_wallets_list(active=True),
+    "get_wallet_pool_size": get_wallet_pool_size,
+    "upsert_raw_transactions_from_blockchain": lambda: upsert_raw_transactions_from_blockchain(
+        [mined_transaction(RAW_TRANSACTIONS + 1)]
+    ),
+    "create_system_transactions": lambda: create_system_transactions(
+        [
+            (
+                {
+                    "id": 2000,
+                    "tx_value": 10**15,
+                    "tx_fee": 0,
+                    "status": RawTransactionStatus.PENDING,
+                },
+                {"id": 3},
+                TransactionDirection.IN,
+            )
+        ]
+    ),
+    # Nothing is old enough, only the lookup of the oldest finalized transaction is sent.
+    "archive_finalized_transactions": archive_finalized_transactions,
+    "archive batch": lambda: fetch_rows(
+        _archive_batch_query(datetime.utcnow() - timedelta(days=90), 5_000)
+    ),
+}
+
+
+@pytest.mark.parametrize("name", SERVICE_CALLS)
+def test_service_query_uses_indexes(explain, name: str) -> None:
+    plans = explain(SERVICE_CALLS[name])
+
+    assert plans, f"{name} sent no statements"
+    for plan in plans:
+        assert not seq_scans(plan["plan"]), f"Seq Scan in {name}:\n{plan['statement']}"
+
+
+def test_missing_index_is_reported(loop, explain) -> None:
+    async def execute(statement: str) -> None:
+        async with async_engine.begin() as connection:
+            await connection.execute(text(statement))
+
+    loop.run_until_complete(execute("DROP INDEX ix_raw_transaction_tx_hash"))
+    try:
+        plans = explain(SERVICE_CALLS["get_raw_transaction_by_hash"])
+    finally:
+        loop.run_until_complete(
+            execute("CREATE UNIQUE INDEX ix_raw_transaction_tx_hash ON raw_transaction (tx_hash)")
+        )
+
+    assert any(seq_scans(plan["plan"]) for plan in plans)
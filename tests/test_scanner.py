@@ -0,0 +1,129 @@
+"""
+Run the block scanner over a hand-built block against the scratch database. The node and
+Redis are replaced with in-memory stand-ins.
+"""
+
+import os
+
+import pytest
+from hexbytes import HexBytes
+from sqlalchemy import select
+
+from src.database.utils import fetch_all, fetch_one, unit_of_work
+from src.modules.scanner import service as scanner_service
+from src.modules.scanner.service import confirm_block
+from src.modules.transactions import service as transactions_service
+from src.modules.transactions.enums import (
+    RawTransactionStatus,
+    TransactionDirection,
+    TransactionStatus,
+)
+from src.modules.transactions.models import SystemTransaction
+from src.modules.transactions.service import (
+    confirm_pending_raw_transactions,
+    get_raw_transaction_by_hash,
+)
+from src.modules.wallets.enums import WalletStatus
+from src.modules.wallets.models import Wallet
+from src.modules.wallets.service import create_wallet
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URI"), reason="TEST_DATABASE_URI is not set"
+)
+
+# Head below every seeded block, so no PENDING transaction reaches the node to be confirmed.
+BLOCK_NUMBER = 1
+DEPOSIT_VALUE = 10**18
+
+
+def deposit_block(
+    to_address: str, tx_hash: str = "0x" + "ab" * 32, block_number: int = BLOCK_NUMBER
+) -> tuple[dict, dict]:
+    transaction = {
+        "hash": HexBytes(tx_hash),
+        "from": "0x" + "11" * 20,
+        "to": to_address,
+        "value": DEPOSIT_VALUE,
+        "input": HexBytes("0x"),
+        "gasPrice": 10**9,
+        "gas": 21000,
+        "nonce": 0,
+        "blockNumber": block_number,
+        "maxFeePerGas": 10**9,
+        "maxPriorityFeePerGas": 10**9,
+    }
+    receipt = {"gasUsed": 21000, "effectiveGasPrice": 10**9}
+    return {"number": block_number, "transactions": [transaction]}, receipt
+
+
+def scan(loop, monkeypatch, block: dict, receipt: dict) -> None:
+    async def get_block_receipts(w3, block_number: int, tx_hashes: list[str]) -> dict:
+        return {tx_hash: receipt for tx_hash in tx_hashes}
+
+    monkeypatch.setattr(scanner_service, "get_block_receipts", get_block_receipts)
+
+    async def confirm() -> None:
+        async with unit_of_work():
+            await confirm_block(block["number"], block_info=block)
+
+    loop.run_until_complete(confirm())
+
+
+def test_deposit_to_inactive_wallet_is_detected(
+    loop, migrated_database, fake_redis, monkeypatch
+) -> None:
+    wallet = loop.run_until_complete(create_wallet(activate=False))
+    assert wallet["status"] == WalletStatus.INACTIVE
+
+    scan(loop, monkeypatch, *deposit_block(wallet["address"]))
+
+    system_transactions = loop.run_until_complete(
+        fetch_all(select(SystemTransaction).where(SystemTransaction.wallet_id == wallet["id"]))
+    )
+    assert [
+        (system_transaction["direction"], system_transaction["status"])
+        for system_transaction in system_transactions
+    ] == [(TransactionDirection.IN, TransactionStatus.PENDING)]
+
+    wallet = loop.run_until_complete(fetch_one(select(Wallet).where(Wallet.id == wallet["id"])))
+    assert wallet["pending_balance"] == DEPOSIT_VALUE
+
+
+def test_transaction_missing_at_confirmation_waits_to_be_mined_again(
+    loop, migrated_database, fake_redis, monkeypatch
+) -> None:
+    wallet = loop.run_until_complete(create_wallet(activate=True))
+    tx_hash = "0x" + "cd" * 32
+    scan(loop, monkeypatch, *deposit_block(wallet["address"], tx_hash=tx_hash))
+
+    # Reorged out by the time it has enough confirmations.
+    async def batch_request(calls: list[tuple[str, list]]) -> list[dict | None]:
+        return [None if params == [tx_hash] else {"hash": params[0]} for _, params in calls]
+
+    monkeypatch.setattr(transactions_service, "batch_request", batch_request)
+
+    async def confirm() -> None:
+        async with unit_of_work():
+            await confirm_pending_raw_transactions(BLOCK_NUMBER + 11)
+
+    loop.run_until_complete(confirm())
+
+    raw_transaction = loop.run_until_complete(get_raw_transaction_by_hash(tx_hash))
+    assert raw_transaction["status"] == RawTransactionStatus.BROADCASTED
+    system_transaction = loop.run_until_complete(
+        fetch_one(
+            select(SystemTransaction).where(SystemTransaction.origin_id == raw_transaction["id"])
+        )
+    )
+    # Still counted as pending, nothing is moved until the transaction settles.
+    assert system_transaction["status"] == TransactionStatus.PENDING
+    wallet = loop.run_until_complete(fetch_one(select(Wallet).where(Wallet.id == wallet["id"])))
+    assert wallet["pending_balance"] == DEPOSIT_VALUE
+
+    scan(loop, monkeypatch, *deposit_block(wallet["address"], tx_hash=tx_hash, block_number=20))
+
+    raw_transaction = loop.run_until_complete(get_raw_transaction_by_hash(tx_hash))
+    assert (raw_transaction["status"], raw_transaction["block_number"]) == (
+        RawTransactionStatus.PENDING,
+        20,
+    )
@@ -0,0 +1,247 @@
+"""
+Withdrawals against the scratch database, with the node, Celery and Redis replaced by
+in-memory stand-ins.
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+from hexbytes import HexBytes
+from sqlalchemy import insert
+
+from src.core.config import settings, w3_obj
+from src.database.utils import fetch_one
+from src.modules.transactions.enums import RawTransactionStatus
+from src.modules.transactions.models import RawTransaction
+from src.modules.transactions.service import (
+    get_raw_transaction_by_id,
+    upsert_raw_transactions_from_blockchain,
+)
+from src.modules.wallets import service as wallets_service
+from src.modules.wallets.enums import WithdrawalStatus
+from src.modules.wallets.service import (
+    create_wallet,
+    enqueue_withdrawal,
+    get_withdrawal,
+    redrive_withdrawals,
+    withdraw_from_wallet,
+)
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_DATABASE_URI"), reason="TEST_DATABASE_URI is not set"
+)
+
+NONCE = 7
+
+
+@pytest.fixture
+def wallet(loop, migrated_database, fake_redis) -> dict:
+    return loop.run_until_complete(create_wallet(activate=True))
+
+
+@pytest.fixture
+def nonces(monkeypatch) -> list[tuple[str, int]]:
+    """Nonce calls of the withdrawal, in order."""
+    calls = []
+
+    def record(name: str, result: int | None = None):
+        async def call(wallet: dict, nonce: int | None = None) -> int | None:
+            calls.append((name, nonce))
+            return result
+
+        return call
+
+    monkeypatch.setattr(wallets_service, "allocate_nonce", record("allocate", NONCE))
+    monkeypatch.setattr(wallets_service, "commit_nonce", record("commit"))
+    monkeypatch.setattr(wallets_service, "release_nonce", record("release"))
+    monkeypatch.setattr(wallets_service, "resync_nonce", record("resync", NONCE))
+    return calls
+
+
+@pytest.fixture
+def created_transactions(monkeypatch) -> list[dict]:
+    """Store raw transactions unsigned, signing needs the gas oracle and worker pool."""
+    created = []
+
+    async def create_raw_transaction(
+        amount: str, transaction_to: str, wallet: dict, gas_policy, nonce: int
+    ) -> dict:
+        query = (
+            insert(RawTransaction)
+            .values(
+                status=RawTransactionStatus.CREATED,
+                tx_hash="0x" + os.urandom(32).hex(),
+                tx_from=wallet["address"],
+                tx_to=transaction_to,
+                tx_value=10**18,
+                gas_limit=21000,
+                nonce=nonce,
+                max_fee_per_gas=10**9,
+                max_priority_fee_per_gas=10**9,
+                raw="0x02",
+            )
+            .returning(RawTransaction)
+        )
+        created.append(await fetch_one(query))
+        return created[-1]
+
+    monkeypatch.setattr(wallets_service, "create_raw_transaction", create_raw_transaction)
+    return created
+
+
+def send_raising(monkeypatch, exc: Exception) -> None:
+    async def send_raw_transaction(raw: HexBytes) -> None:
+        raise exc
+
+    monkeypatch.setattr(w3_obj.eth, "send_raw_transaction", send_raw_transaction)
+
+
+def withdraw(loop, wallet: dict) -> dict:
+    return loop.run_until_complete(
+        withdraw_from_wallet(wallet=wallet, amount="1", to_address="0x" + "22" * 20)
+    )
+
+
+def test_broadcast_timeout_keeps_transaction_and_nonce(
+    loop, wallet, nonces, created_transactions, monkeypatch
+) -> None:
+    send_raising(monkeypatch, asyncio.TimeoutError())
+
+    raw_transaction = withdraw(loop, wallet)
+
+    assert raw_transaction["status"] == RawTransactionStatus.BROADCASTED
+    # Neither committed nor released, the nonce stays in flight.
+    assert nonces == [("allocate", None)]
+
+
+def test_broadcast_rejection_releases_nonce(
+    loop, wallet, nonces, created_transactions, monkeypatch
+) -> None:
+    send_raising(monkeypatch, ValueError({"code": -32000, "message": "insufficient funds"}))
+
+    with pytest.raises(ValueError):
+        withdraw(loop, wallet)
+
+    assert nonces == [("allocate", None), ("release", NONCE)]
+
+
+def test_rejected_transaction_mined_later_becomes_pending(
+    loop, wallet, nonces, created_transactions, monkeypatch
+) -> None:
+    send_raising(monkeypatch, ValueError({"code": -32000, "message": "insufficient funds"}))
+
+    with pytest.raises(ValueError):
+        withdraw(loop, wallet)
+
+    (raw_transaction,) = created_transactions
+    raw_transaction = loop.run_until_complete(get_raw_transaction_by_id(raw_transaction["id"]))
+    assert raw_transaction["status"] == RawTransactionStatus.FAILED
+
+    mined = {
+        "hash": HexBytes(raw_transaction["tx_hash"]),
+        "from": raw_transaction["tx_from"],
+        "to": raw_transaction["tx_to"],
+        "value": raw_transaction["tx_value"],
+        "input": HexBytes("0x"),
+        "gasPrice": 10**9,
+        "gas": 21000,
+        "nonce": NONCE,
+        "blockNumber": 1,
+        "maxFeePerGas": 10**9,
+        "maxPriorityFeePerGas": 10**9,
+    }
+    receipt = {"gasUsed": 21000, "effectiveGasPrice": 10**9}
+
+    stored = loop.run_until_complete(upsert_raw_transactions_from_blockchain([(mined, receipt)]))
+
+    assert stored[raw_transaction["tx_hash"]]["status"] == RawTransactionStatus.PENDING
+
+
+@pytest.fixture
+def dispatched(monkeypatch) -> list[str]:
+    """Wallets a broadcaster task was sent for."""
+    calls = []
+
+    async def dispatch_broadcaster(wallet_external_id: str) -> None:
+        calls.append(wallet_external_id)
+
+    monkeypatch.setattr(wallets_service, "_dispatch_broadcaster", dispatch_broadcaster)
+    return calls
+
+
+def abandon_in_processing(loop, fake_redis, wallet: dict, withdrawal_id: str) -> None:
+    """Broadcaster took the withdrawal and died, a later one skipped it and trimmed the queue."""
+    loop.run_until_complete(
+        wallets_service._set_withdrawal_status(withdrawal_id, WithdrawalStatus.PROCESSING)
+    )
+    fake_redis.data[wallets_service.PROCESSING_WITHDRAWALS_KEY][withdrawal_id.encode()] -= (
+        settings.WITHDRAWAL_PROCESSING_TIMEOUT + 1
+    )
+    fake_redis.data.pop(wallets_service._withdrawal_queue_key(wallet["external_id"]))
+
+
+def test_redrive_requeues_withdrawal_abandoned_before_signing(
+    loop, wallet, fake_redis, dispatched
+) -> None:
+    accepted = loop.run_until_complete(
+        enqueue_withdrawal(wallet=wallet, amount="1", to_address="0x" + "22" * 20)
+    )
+    abandon_in_processing(loop, fake_redis, wallet, accepted["id"])
+
+    assert loop.run_until_complete(redrive_withdrawals()) == 1
+
+    withdrawal = loop.run_until_complete(get_withdrawal(accepted["id"]))
+    assert withdrawal["status"] == WithdrawalStatus.ACCEPTED
+    queued = loop.run_until_complete(
+        fake_redis.lrange(wallets_service._withdrawal_queue_key(wallet["external_id"]), 0, -1)
+    )
+    assert [json.loads(item)["id"] for item in queued] == [accepted["id"]]
+    assert dispatched == [wallet["external_id"], wallet["external_id"]]
+
+
+def test_redrive_settles_withdrawal_abandoned_while_broadcasting(
+    loop, wallet, fake_redis, dispatched, created_transactions
+) -> None:
+    accepted = loop.run_until_complete(
+        enqueue_withdrawal(wallet=wallet, amount="1", to_address="0x" + "22" * 20)
+    )
+    raw_transaction = loop.run_until_complete(
+        wallets_service.create_raw_transaction(
+            amount="1", transaction_to="0x" + "22" * 20, wallet=wallet, gas_policy=None, nonce=NONCE
+        )
+    )
+    loop.run_until_complete(
+        fake_redis.hset(
+            wallets_service._withdrawal_key(accepted["id"]), "tx_hash", raw_transaction["tx_hash"]
+        )
+    )
+    abandon_in_processing(loop, fake_redis, wallet, accepted["id"])
+
+    # Nothing is queued anymore, no broadcaster is needed.
+    assert loop.run_until_complete(redrive_withdrawals()) == 0
+
+    withdrawal = loop.run_until_complete(get_withdrawal(accepted["id"]))
+    assert (withdrawal["status"], withdrawal["tx_hash"]) == (
+        WithdrawalStatus.BROADCASTED,
+        raw_transaction["tx_hash"],
+    )
+    raw_transaction = loop.run_until_complete(get_raw_transaction_by_id(raw_transaction["id"]))
+    assert raw_transaction["status"] == RawTransactionStatus.BROADCASTED
+    assert not loop.run_until_complete(fake_redis.smembers(wallets_service.WITHDRAWAL_QUEUES_KEY))
+
+
+def test_redrive_leaves_withdrawal_in_progress(loop, wallet, fake_redis, dispatched) -> None:
+    accepted = loop.run_until_complete(
+        enqueue_withdrawal(wallet=wallet, amount="1", to_address="0x" + "22" * 20)
+    )
+    loop.run_until_complete(
+        wallets_service._set_withdrawal_status(accepted["id"], WithdrawalStatus.PROCESSING)
+    )
+
+    # Its queue is still not empty, the broadcaster is dispatched again.
+    assert loop.run_until_complete(redrive_withdrawals()) == 1
+
+    withdrawal = loop.run_until_complete(get_withdrawal(accepted["id"]))
+    assert withdrawal["status"] == WithdrawalStatus.PROCESSING